@@ -7,6 +7,7 @@ import errno
 import pickle
 import curses
 from .geotag import App
+from .table import TABLE_FORMATS
 
 def main():
     desc = 'Interface to quickly tag geo data sets. Set a user name through ' \
@@ -18,6 +19,38 @@ def main():
                         'samples line-wise and at least the columns '
                         '`gse` and `id`.',
                         nargs='+', metavar='path.tsv')
+    parser.add_argument('--tableFormat',
+                        help='Format of the tables. By default it is '
+                        'inferred from the file extension, e.g., `.tsv.gz`, '
+                        '`.parquet` or `.sqlite`.',
+                        choices=TABLE_FORMATS)
+    parser.add_argument('--jobs',
+                        help='Number of processes that read the tables in '
+                        'parallel.',
+                        type=int, metavar='n', default=1)
+    parser.add_argument('--stream',
+                        help='Show the tables while they are still read. '
+                        'Tagging is enabled once they are loaded.',
+                        action="store_true")
+    parser.add_argument('--where',
+                        help='Only load the rows satisfying all of the '
+                        'predicates `col=value`, `col~regex` or `col@path` '
+                        'with one value per line in the file at path.',
+                        nargs='+', metavar='predicate')
+    parser.add_argument('--widthSample',
+                        help='Number of randomly sampled rows used to '
+                        'measure the width of a column.',
+                        type=int, metavar='n', default=100000)
+    parser.add_argument('--lineCache',
+                        help='Number of formatted table lines that are kept '
+                        'in memory. At least three screens of lines are '
+                        'kept.',
+                        type=int, metavar='n', default=10000)
+    parser.add_argument('--searchIndex',
+                        help='Index the trigrams of the string columns to '
+                        'speed up searches and filters. The index is kept '
+                        'next to the table snapshot.',
+                        action="store_true")
     parser.add_argument('--log',
                         help='The file path for the log.',
                         type=str, metavar='path',
@@ -42,8 +75,19 @@ def main():
                         type=str, metavar='path.pkl',
                         default=f"{os.environ['HOME']}/geotag/"
                                 f"{os.environ['USER']}.pkl")
+    parser.add_argument('--tableCache',
+                        help='Directory for a binary snapshot of the loaded '
+                        'tables that is reused while they are unchanged. '
+                        'Defaults to the state path with the extension '
+                        '`.table`.',
+                        type=str, metavar='path')
+    parser.add_argument('--publish',
+                        help='Only write the table snapshot to the '
+                        '--tableCache directory shared by all sessions and '
+                        'exit. --stream is ignored.',
+                        action="store_true")
     parser.add_argument('--update',
-                        help='Overwrite the cache.',
+                        help='Overwrite the cache and the table snapshot.',
                         action="store_true")
     parser.add_argument('--showKey',
                         help='Show key stroke in status bar.',
@@ -52,11 +96,12 @@ def main():
                         help='Display version.',
                         action="version",
                         version=App.__version__)
-    assert os.environ.get('TMUX'), 'Please run geotag inside a tmux.'
-    assert curses.wrapper(lambda sc: hasattr(sc, "get_wch")), \
-            'The curses module of your python is compiled without the ' \
-            'required get_wch funtion.'
     args = parser.parse_args()
+    if not args.publish:
+        assert os.environ.get('TMUX'), 'Please run geotag inside a tmux.'
+        assert curses.wrapper(lambda sc: hasattr(sc, "get_wch")), \
+                'The curses module of your python is compiled without the ' \
+                'required get_wch funtion.'
     args.user = os.environ['USER']
     log_path, _ = os.path.split(args.log)
     if log_path == f"{os.environ['HOME']}/geotag":
@@ -65,12 +110,25 @@ def main():
         except OSError as e:
             if e.errno != errno.EEXIST:
                 raise
-    app = App(**vars(args))
+    cache = None
+    if args.publish:
+        # a stream would only be read after the snapshot was written
+        app = App(**dict(vars(args), stream=False))
+        print(f'Published the table snapshot in {app.table_snapshot}.')
+        return
     if not args.update and os.path.exists(args.state):
         try:
             with open(args.state, 'rb') as f:
-                app.cache = pickle.load(f)
-        except Exception as e:
+                cache = pickle.load(f)
+        except Exception:
+            print('Failed to load previos state. Pass --update to overwrite.')
+            raise
+    # the state only selects the columns to load before it is applied
+    app = App(cache=cache, **vars(args))
+    if cache is not None:
+        try:
+            app.cache = cache
+        except Exception:
             print('Failed to load previos state. Pass --update to overwrite.')
             raise
     try:
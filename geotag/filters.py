@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2019 Gesellschaft zur Foerderung der angewandten Forschung e.V.
+# acting on behalf of its Fraunhofer Institute for Cell Therapy and Immunology
+# (IZI).
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with
+# this program. If not, see http://www.gnu.org/licenses/.
+
+"""Row masks of the regular expression filters of the view.
+
+A column is reduced once to its distinct values as strings and the codes
+of the rows into them. A pattern is then only tested on the distinct
+values and the masks of the recently used patterns are kept per column.
+The search for a pattern in all columns of the view runs in the background.
+With a trigram index of a column only the distinct values that contain the
+literal text of a pattern are tested.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+
+@lru_cache(maxsize=256)
+def compile_pattern(pattern):
+    """ Returns the compiled regular expression ``pattern``. """
+    return re.compile(pattern)
+
+
+def distinct(values):
+    """ Returns the codes of the rows and the distinct values as strings.
+
+    Missing values have the code -1.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.values, values.cat.categories.astype(str)
+    codes, uniques = pd.factorize(values)
+    return codes, pd.Index(uniques, dtype=object).astype(str)
+
+
+def matches(strings, pattern, index=None, key=None):
+    """ Returns a mask of the ``strings`` that contain ``pattern``.
+
+    Only the candidates of the ``ngrams.TrigramIndex`` ``index`` are tested
+    if one is given. ``key`` identifies the ``strings`` for the index.
+    """
+    search = compile_pattern(pattern).search
+    candidates = None
+    if index is not None:
+        candidates = index.narrow(strings, pattern, key)
+    if candidates is None:
+        return np.fromiter((search(s) is not None for s in strings),
+                           dtype=bool, count=len(strings))
+    mask = np.zeros(len(strings), dtype=bool)
+    mask[candidates] = np.fromiter(
+        (search(s) is not None for s in np.asarray(strings)[candidates]),
+        dtype=bool, count=len(candidates))
+    return mask
+
+
+def contains(values, pattern, index=None):
+    """ Returns a mask of the values whose string contains ``pattern``. """
+    codes, strings = distinct(values)
+    return np.append(matches(strings, pattern, index), False)[codes]
+
+
+class MaskCache:
+    """ Masks of the filter patterns per column.
+
+    The masks of a column are dropped when it is requested with a new
+    ``token``, which is anything that changes with the values of the column.
+    """
+
+    def __init__(self, patterns_per_column=8):
+        self.patterns_per_column = patterns_per_column
+        self._columns = dict()
+
+    def clear(self):
+        self._columns = dict()
+
+    def mask(self, col, token, values, pattern, index=None):
+        """ Returns the mask of the rows of ``values`` that contain
+        ``pattern`` using the trigram ``index`` of the column if given. """
+        entry = self._columns.get(col)
+        if entry is None or entry[0] != token:
+            codes, strings = distinct(values)
+            entry = self._columns[col] = (token, codes, strings, OrderedDict())
+        _, codes, strings, masks = entry
+        if pattern in masks:
+            masks.move_to_end(pattern)
+            return masks[pattern]
+        mask = np.append(matches(strings, pattern, index), False)[codes]
+        masks[pattern] = mask
+        if len(masks) > self.patterns_per_column:
+            masks.popitem(last=False)
+        return mask
+
+
+def combine(masks, length):
+    """ Returns the positions of the rows in all ``masks``. """
+    if not masks:
+        return np.arange(length)
+    mask = masks[0].copy()
+    for other in masks[1:]:
+        mask &= other
+    return np.flatnonzero(mask)
+
+
+class Search:
+    """ Searches all columns of a view for a pattern on a background thread.
+
+    The rows are searched in chunks starting at ``start`` and going down, or
+    up if ``backward``, and wrapping around at the end. ``result`` returns
+    the sorted positions of the rows found so far and a mask of the rows
+    searched so far. ``cancel`` stops the search after the current chunk.
+    ``indexes`` are the trigram indexes of columns.
+    """
+
+    def __init__(self, df, pattern, start=0, backward=False,
+                 chunksize=20000, indexes=None):
+        compile_pattern(pattern)  # raises invalid patterns right away
+        self.pattern = pattern
+        self.length = len(df)
+        self.chunksize = chunksize
+        self.error = None
+        self.done = False
+        self.cancelled = False
+        self._columns = [(df[col], (indexes or dict()).get(col))
+                         for col in df.columns]
+        self._chunks = list()
+        self._hits = np.empty(0, dtype=np.int64)
+        self._searched = np.zeros(self.length, dtype=bool)
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._search, args=(start, backward), daemon=True)
+        self._thread.start()
+
+    def _bounds(self, start, backward):
+        size = self.chunksize
+        starts = np.arange(0, self.length, size)
+        first = min(start, self.length - 1) // size if self.length else 0
+        if backward:
+            order = np.concatenate([starts[first::-1],
+                                    starts[:first:-1]])
+        else:
+            order = np.concatenate([starts[first:], starts[:first]])
+        return [(int(s), int(min(s + size, self.length))) for s in order]
+
+    def _maskers(self):
+        """ Returns a function per column that returns the mask of the rows
+        from start to stop that contain the pattern. """
+        maskers = list()
+        for values, index in self._columns:
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                categories = values.cat.categories
+                hit = np.append(matches(categories.astype(str), self.pattern,
+                                        index, key=categories), False)
+                codes = values.cat.codes.values
+                maskers.append(lambda a, b, hit=hit, codes=codes:
+                               hit[codes[a:b]])
+            else:
+                maskers.append(lambda a, b, values=values, index=index:
+                               contains(values.iloc[a:b], self.pattern,
+                                        index))
+        return maskers
+
+    def _search(self, start, backward):
+        try:
+            maskers = self._maskers()
+            for a, b in self._bounds(start, backward):
+                if self.cancelled:
+                    return
+                mask = np.zeros(b - a, dtype=bool)
+                for masker in maskers:
+                    mask |= masker(a, b)
+                with self._lock:
+                    self._chunks.append(np.flatnonzero(mask) + a)
+                    self._searched[a:b] = True
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = not self.cancelled
+
+    def result(self):
+        """ Returns the sorted positions of the rows found so far and the
+        mask of the rows searched so far. """
+        with self._lock:
+            if self._chunks:
+                self._hits = np.sort(np.concatenate([self._hits] +
+                                                    self._chunks))
+                self._chunks = list()
+            return self._hits, self._searched
+
+    @property
+    def progress(self):
+        return self._searched.mean() if self.length else 1.
+
+    def cancel(self):
+        self.cancelled = True
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2019 Gesellschaft zur Foerderung der angewandten Forschung e.V.
+# acting on behalf of its Fraunhofer Institute for Cell Therapy and Immunology
+# (IZI).
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with
+# this program. If not, see http://www.gnu.org/licenses/.
+
+"""Formatting of blocks of table rows to lines of fixed width columns.
+
+The rows are formatted column by column. Each distinct value of a column is
+formatted once and the padding and cutting to the column width is done with
+NumPy string operations on all of them at once.
+"""
+
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+
+def _fit(text, width):
+    """ Cuts the strings ``text`` to ``width`` or pads them from the
+    left. """
+    text = np.asarray(text, dtype=str)
+    long = np.char.str_len(text) > width
+    result = np.char.rjust(text, width).astype(object)
+    if long.any():
+        if width < 3:
+            result[long] = '...'[:width]
+        elif width == 3:
+            result[long] = '...'
+        else:
+            # casting to a shorter unicode type cuts the strings
+            result[long] = np.char.add(text[long].astype(f'<U{width - 3}'),
+                                       '...')
+    return result
+
+
+def _format_int(value, width, missing):
+    if isinstance(value, float) and np.isnan(value):
+        return ' ' * (width - 1) + missing
+    return f'%{width}d' % value
+
+
+def _first_line(value):
+    lines = str(value).splitlines()
+    return lines[0] if lines else ''
+
+
+def format_cells(values, width, is_int=False, missing='-'):
+    """ Returns the ``values`` as strings of ``width`` characters.
+
+    Integer tags are formatted with ``%d`` and any other value as the first
+    line of its string.
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    uniques = np.asarray(uniques, dtype=object)
+    is_missing = np.asarray(uniques == missing, dtype=bool)
+    if is_int:
+        text = [_format_int(value, width, missing)
+                for value in uniques[~is_missing]]
+    else:
+        text = [_first_line(value) for value in uniques[~is_missing]]
+    formatted = np.empty(len(uniques), dtype=object)
+    formatted[is_missing] = ' ' * (width - 1) + missing
+    if text:
+        formatted[~is_missing] = _fit(text, width)
+    return formatted[codes]
+
+
+def format_lines(df, rows, widths, int_columns=(), separator=' ',
+                 missing='-'):
+    """ Returns the ``rows`` of ``df`` as lines.
+
+    ``widths`` are pairs of a column and its width.
+    """
+    if not widths:
+        return [''] * len(rows)
+    block = df.iloc[rows]
+    columns = [format_cells(block[col].array, width, col in int_columns,
+                            missing)
+               for col, width in widths]
+    return [separator.join(cells) for cells in zip(*columns)]
+
+
+class LineCache:
+    """ The formatted lines of the most recently shown rows.
+
+    Each line is stored with the generation of the view it was formatted
+    for. ``clear`` only starts a new generation and the lines of older ones
+    are evicted as new lines come in.
+    """
+
+    def __init__(self, capacity=10000):
+        self.capacity = capacity
+        self.generation = 0
+        self._lines = OrderedDict()
+
+    def __contains__(self, row):
+        entry = self._lines.get(row)
+        return entry is not None and entry[0] == self.generation
+
+    def __setitem__(self, row, line):
+        self._lines[row] = (self.generation, line)
+        self._lines.move_to_end(row)
+        while len(self._lines) > self.capacity:
+            self._lines.popitem(last=False)
+
+    def get(self, row, default=None):
+        """ Returns the line of ``row`` or ``default`` if it is not
+        formatted. """
+        if row not in self:
+            return default
+        self._lines.move_to_end(row)
+        return self._lines[row][1]
+
+    def reserve(self, size):
+        """ Raises the capacity to at least ``size`` lines. """
+        self.capacity = max(self.capacity, size)
+
+    def clear(self):
+        self.generation += 1
+
+    def discard(self, rows):
+        """ Drops the lines of the ``rows``. """
+        for row in rows:
+            self._lines.pop(row, None)
+
+    def items(self):
+        """ Returns the rows and lines of the current generation from the
+        least recently used on. """
+        return [(row, line) for row, (generation, line) in self._lines.items()
+                if generation == self.generation]
@@ -15,18 +15,28 @@
 # this program. If not, see http://www.gnu.org/licenses/.
 
 import os
+import re
 import curses
 from curses.textpad import Textbox, rectangle
 import locale
 import logging
-from pydoc import locate
 from datetime import datetime
 import glob
 import random
+import time
+import itertools
 import yaml
 import pandas as pd
 import numpy as np
 from .undo import stack, undoable
+from . import table as tables
+from . import filters
+from . import formatting
+from . import ngrams
+from . import positions
+from . import render
+from . import sorting
+from . import tagstore
 
 # use system default localization
 locale.setlocale(locale.LC_ALL, 'C')
@@ -63,7 +73,7 @@ default_tags = {
 }
 
 
-def uniquify(vals):
+def _uniquify(vals):
     seen = set()
     for item in vals:
         fudge = 1
@@ -75,6 +85,22 @@ def uniquify(vals):
         seen.add(newitem)
 
 
+def uniquify(vals):
+    """ Returns the values with "_<n>" appended to the n-th repetition. """
+    result = np.array(vals, dtype=object)
+    if len(set(result)) == len(result):
+        return result
+    codes, _ = pd.factorize(result, use_na_sentinel=False)
+    count = pd.Series(codes).groupby(codes).cumcount().values
+    repeated = np.flatnonzero(count)
+    result[repeated] = ["{}_{}".format(item, fudge) for item, fudge in
+                        zip(result[repeated], count[repeated] + 1)]
+    if len(set(result)) == len(result):
+        return result
+    # a suffixed value collides with another value
+    return np.array(list(_uniquify(vals)), dtype=object)
+
+
 class App:
 
     __version__ = '0.2.0'
@@ -85,6 +111,7 @@ class App:
     _control_seq_parts.add(b';')
     _control_seq_parts.add(b'[')
     _required_columns = {'id', 'gse'}
+    stream_chunk_size = 50000
     view_attributes = {
         'selection',
         'pointer',
@@ -98,9 +125,25 @@ class App:
         'sort_columns',
         'sort_reverse_columns',
         'ordered_columns',
-        'color_by'
+        'color_by',
+        'pin_columns'
     }
     _window_width = 140
+    # keys that move the pointer or the window and take a count at once
+    _movement_keys = {
+        b'KEY_UP', b'KEY_DOWN', b'KEY_SR', b'KEY_SF', b'\x1b[1;2A',
+        b'\x1b[1;2B', b'KEY_LEFT', b'KEY_RIGHT', b'KEY_SLEFT', b'KEY_SRIGHT',
+        b'\x1b[1;2C', b'\x1b[1;2D', b'KEY_PPAGE', b'KEY_NPAGE'
+    }
+    # keys that only change what the next frame draws
+    _quiet_keys = _byte_numbers | {
+        b'', b'\x01', b'd', b'u', b'r', b' ', b'p', b':', b'KEY_UP', b'KEY_DOWN',
+        b'KEY_SR', b'KEY_SF', b'KEY_LEFT', b'KEY_RIGHT', b'KEY_SLEFT',
+        b'KEY_SRIGHT', b'KEY_PPAGE', b'KEY_NPAGE', b'KEY_HOME', b'KEY_END',
+        b'\x1b[1;2A', b'\x1b[1;2B', b'\x1b[1;2C', b'\x1b[1;2D',
+        b'\x1b[1;5A', b'\x1b[1;5B', b'\x1b[1;6A', b'\x1b[1;6B',
+        b'\x1b[5;2~', b'\x1b[6;2~'
+    }
     _helptext = """
         h               Show/hide help window.
         v               View-dialog.
@@ -110,6 +153,8 @@ class App:
         q               Quit geotag.
 
         0-9             Set tag info for selected samples.
+        :n              Repeat the next key n times, e.g., :25 Down.
+                        With d it deletes the tag info of n rows.
         d               Delete tag info for selected samples.
         u               Undo.
         r               Redo.
@@ -125,14 +170,20 @@ class App:
         Ctrl+Donw       Jump to next untagged entry below.
         Ctrl+Shift+Up   Add next untagged entry above to selection.
         Ctrl+Shift+Down Add next untagged entry below to selection.
+        [               Jump to previous entry with other tag info.
+        ]               Jump to next entry with other tag info.
+        =               Jump to next entry with given tag info.
+        {               Jump to previous entry with that tag info.
+        }               Jump to next entry with that tag info.
         Pageup          Move upward one page.
         Pagedown        Move down one page.
         Shift+Pageup    Select upward one page.
         ShiftPagedown   Select down one page.
         Home            Move to the start of the table.
         End             Move to the end of the table.
-        g               Go to position dialog.
-        G               Go to and add position to selection dialog.
+        g               Go to position, sample or series dialog.
+        G               Go to and add position, sample or series to
+                        selection dialog.
         f               Search for string in displayed columns.
         F               Search and select all rows with matches.
         n               Go to next search match.
@@ -142,11 +193,15 @@ class App:
         Right           Move to the right hand side.
         Shift+Left      Move to the left by half a page.
         Shift+Right     Move to the right by half a page.
+        p               Pin id and the tagged column on the left.
         Ctrl+a          Select all.
         """.splitlines()
 
     def __init__(self, table, log, tags, output, user, softPath,
-                 showKey, **kwargs):
+                 showKey, state=None, tableCache=None, update=False, jobs=1,
+                 widthSample=100000, stream=False, where=None,
+                 tableFormat=None, lineCache=10000, searchIndex=False,
+                 cache=None, **kwargs):
         logging.basicConfig(filename=log, filemode='a', level=logging.DEBUG,
                             format='[%(asctime)s] %(levelname)s: %(message)s')
         # settings
@@ -160,6 +215,29 @@ class App:
         self.log = log
         self.user = user
         self.tables = table
+        self.table_format = tableFormat
+        if tableCache is None and state is not None:
+            tableCache = os.path.splitext(state)[0] + '.table'
+        self.table_cache = tableCache
+        self.use_table_cache = not update
+        self._table_parts = []
+        self._column_catalog = []
+        self.where = tables.parse_where(where)
+        self.where_text = ' '.join(where or [])
+        self.table_snapshot = None
+        if tableCache:
+            self.table_snapshot = os.path.join(
+                tableCache, tables.snapshot_name(table, self.where))
+        self.search_index = searchIndex
+        self._ngram_dir = None
+        if self.table_snapshot:
+            self._ngram_dir = self.table_snapshot + '.ngrams'
+        self._reuse_ngrams = not update
+        self._ngrams = dict() # trigram index by column
+        self._wanted_columns = self._view_columns(cache)
+        self.jobs = jobs
+        self.width_sample = widthSample
+        self.stream = stream
         self.softPath = softPath
         self.tags_file = tags
         self.column_seperator = ' '
@@ -171,28 +249,50 @@ class App:
         self.tag_error = None
         self.last_saver_pid = None
         self.search_string = ''
+        self._search = (None, None, None) # view, pattern and search
+        self._search_action = None # the action waiting for the search
         self.tags = dict()
-        self.tag_data = dict()
+        self.tag_data = tagstore.TagStore(pd.Index([]))
         # init content variables
         self.df = None # the pandas data frame
         self.header = ''
-        self.lines = []
+        self.lines = formatting.LineCache(lineCache)
         self.total_lines = 0
         self.pointer = 0
         self.selection = {self.pointer}
         self.lrpos = 0
+        self.pin_columns = False
+        self.count_prefix = None # digits typed after ":"
+        self._line_columns = None
         self.top = 0
-        self.stale_lines = set()
         self.ordered_columns = []
         self.sort_columns = set()
         self.sort_reverse_columns = set()
         self.filter = dict()
         self.coloring_now = None
         self.colmap = lambda x: None
+        self._colors = (None, None, None) # view, colormap and row colors
+        self._value_positions = (None, dict()) # view and positions by tag
+        self.jump_value = None # the tag value to jump to with { and }
+        self._accessions = (None, None) # merge version and accessions
+        self._view_rows = (None, None) # view and position of merged rows
         self.in_dialog = False
         self.in_tag_dialog = False
+        self.loading = False
+        self._stream = None
+        self._next_poll = 0
+        # cached stages of the view pipeline
+        self._versions = itertools.count()
+        self._tag_versions = dict()
+        self._tag_changes = dict()
+        self._sorts = sorting.SortCache(self.missing_data_value)
+        self._stages = dict()
+        self._column_cache = dict()
+        self._masks = filters.MaskCache()
         # init variables that get set in dialog:
         self.win = None # a curses floating window
+        self._screen = render.Screen() # what was drawn in the last frame
+        self._overlay = False # a help or dialog window was shown
         self.table_y0 = 0 # table position
         self.table_x0 = 0 # table position
         self.indentation = 0
@@ -211,7 +311,7 @@ class App:
         if not os.path.exists(self.output):
             logging.warning('The output file "%s" dose not exist '
                             'yet. Starting over...', self.output)
-            self.tag_data = dict()
+            self.tag_data = tagstore.TagStore(self.raw_df.index)
         else:
             with open(self.output, 'rb') as f:
                 data = yaml.load(f, Loader=yaml.SafeLoader)
@@ -236,7 +336,9 @@ class App:
                             'Using default tags...', self.tags)
             self.tags = default_tags
         for tag in self.tags:
-            self.tag_data.setdefault(tag, dict())
+            if tag not in self.tag_data:
+                self.tag_data.add(tag)
+                self._touch_tags(tag)
             if tag not in self.ordered_columns:
                 self.ordered_columns = [tag] + self.ordered_columns
 
@@ -266,23 +368,32 @@ class App:
             print('Loading data ...')
         logging.info('Reloading the data tables.')
         try:
-            table_dfs = []
-            for table in self.tables:
-                table_dfs.append(pd.read_csv(table, sep="\t", low_memory=False))
-            self.raw_df = pd.concat(table_dfs, sort=True)
-            for col in ['gse', 'id']:
-                if col not in self.raw_df.columns:
-                    raise Exception('The sample table needs to have the '
-                                    f'column "{col}".')
-            self.raw_df.index = uniquify(
-                self.raw_df['gse'].str.cat(self.raw_df['id'], sep='_')
-            )
-            smap_counts = self.raw_df['gse'].value_counts()
-            self.raw_df['n_sample'] = smap_counts[self.raw_df['gse']].values
-            self._measured_col_width = dict()
-            for col in self.raw_df.columns:
-                l = self.raw_df[col].astype(str).map(len).quantile(.99) + 1
-                self._measured_col_width[col] = int(max(l, len(col)))
+            key = self._snapshot_key(tables.signature(self.tables))
+            snapshot = self._read_table_snapshot(key)
+            if snapshot is None and self.stream and not self.stdscr:
+                self._column_catalog = self._read_catalog()
+                self._start_stream()
+            elif snapshot is None:
+                with tables.snapshot_lock(self.table_snapshot):
+                    # another session may have written it in the meantime
+                    snapshot = self._read_table_snapshot(key)
+                    if snapshot is None:
+                        self._column_catalog = self._read_catalog()
+                        self._parse_tables()
+                        self._write_table_snapshot()
+            if snapshot is not None:
+                logging.info('Using the table snapshot %s.',
+                             self.table_snapshot)
+                self.raw_df, extra = snapshot
+                self._measured_col_width = extra['col_widths']
+                self._table_parts = extra['parts']
+                self._column_catalog = self._read_catalog(self._table_parts)
+            self.use_table_cache = True
+            if not self.loading:
+                self._require_columns(self._wanted_columns or
+                                      self._column_catalog)
+                self._index_columns()
+            for col in self._column_catalog:
                 if col not in self.ordered_columns:
                     self.ordered_columns.append(col)
             self._update_now = True
@@ -293,6 +404,332 @@ class App:
             else:
                 raise
 
+    def _read_table_snapshot(self, key):
+        if not self.table_snapshot or not self.use_table_cache:
+            return None
+        return tables.read_snapshot(self.table_snapshot, key,
+                                    self._wanted_columns)
+
+    def _view_columns(self, cache):
+        """ Returns the columns the view state in ``cache`` needs or None if
+        there is no view state. """
+        view_state = (cache or dict()).get('_view_state') or dict()
+        if 'show_columns' not in view_state:
+            return None
+        columns = set(view_state['show_columns'])
+        columns |= set(view_state.get('sort_columns', set()))
+        columns |= set(view_state.get('sort_reverse_columns', set()))
+        columns |= set(view_state.get('filter', dict()))
+        columns.add(view_state.get('color_by'))
+        columns |= {col for col, _, _ in self.where}
+        return columns | self._required_columns | {'n_sample'}
+
+    def _read_catalog(self, parts=None):
+        """ Returns all columns of the tables. """
+        if parts is None:
+            headers = [tables.table_columns(table, self.table_format)
+                       for table in self.tables]
+        else:
+            headers = [part['columns'] for part in parts]
+        catalog = list()
+        for header in headers:
+            catalog += [col for col in header if col not in catalog]
+        return catalog + ['n_sample']
+
+    def _snapshot_key(self, signature):
+        """ Returns the key of the snapshot of the tables with ``signature``
+        filtered by the ``--where`` predicates. """
+        if not self.where:
+            return signature
+        return {'tables': signature, 'where': self.where}
+
+    def _part_key(self):
+        return self._snapshot_key([[p['path'], p['size'], p['mtime']]
+                                   for p in self._table_parts])
+
+    def _require_columns(self, columns):
+        """ Loads the columns of the catalog in ``columns`` that are not
+        loaded yet. """
+        missing = [col for col in self._column_catalog
+                   if col in columns and col not in self.raw_df.columns]
+        if not missing:
+            return
+        if self.loading:
+            self.error = 'The table is still loading.'
+            return
+        if any(tables.table_change(part) != 'same'
+               for part in self._table_parts):
+            self.error = 'The tables changed. Press l to reload them first.'
+            return
+        logging.info('Loading the columns %s.', missing)
+        key = self._part_key()
+        snapshot = None
+        if self.table_snapshot:
+            snapshot = tables.read_snapshot(self.table_snapshot, key, missing)
+        if snapshot is not None:
+            df = snapshot[0]
+        else:
+            df = pd.DataFrame(index=self.raw_df.index)
+        to_read = [col for col in missing if col not in df.columns]
+        if to_read:
+            # tables without a column still give their rows to align with
+            frames = tables.read_tables(self.tables, self.jobs, set(to_read),
+                                        self.where, self.table_format)
+            if [len(frame) for frame in frames] != \
+                    [part['rows'] for part in self._table_parts]:
+                self.error = 'The tables changed. Press l to reload them first.'
+                return
+            read = tables.concat(frames).reindex(columns=to_read)
+            read = tables.encode_categories(read)
+            for col in to_read:
+                df[col] = read[col].values
+            if self.table_snapshot:
+                try:
+                    with tables.snapshot_lock(self.table_snapshot):
+                        tables.add_to_snapshot(self.table_snapshot, key,
+                                               df[to_read])
+                except (OSError, TypeError, ValueError) as e:
+                    logging.warning('Could not add to the table snapshot '
+                                    '%s: %s', self.table_snapshot, e)
+        for col in missing:
+            self.raw_df[col] = df[col].values
+        self._measure_columns([c for c in missing
+                               if c not in self._measured_col_width])
+        self._index_columns(missing)
+
+    def _parse_tables(self):
+        stats = [os.stat(table) for table in self.tables]
+        frames = tables.read_tables(self.tables, self.jobs,
+                                    self._wanted_columns, self.where,
+                                    self.table_format)
+        self._table_parts = [
+            tables.table_part(table, len(df), self.table_format, stat)
+            for table, df, stat in zip(self.tables, frames, stats)
+        ]
+        self.raw_df = self._index_table(tables.concat(frames))
+        self._measured_col_width = dict()
+        self._measure_columns(self.raw_df.columns)
+
+    def _start_stream(self):
+        """ Starts reading the tables in the background and waits for the
+        first chunk. """
+        self._stream = tables.TableStream(self.tables, self.stream_chunk_size,
+                                          self._wanted_columns, self.where,
+                                          self.table_format)
+        self.loading = True
+        frames = list()
+        while not frames and not self._stream.done:
+            time.sleep(.05)
+            frames += self._stream.fetch()
+        frames += self._stream.fetch()
+        if self._stream.error is not None:
+            raise self._stream.error
+        self.raw_df = self._index_table(tables.concat(frames), encode=False)
+        self._measured_col_width = dict()
+        self._measure_columns(self.raw_df.columns)
+
+    def _poll_stream(self):
+        """ Shows the rows read in the background and finishes the load. """
+        stream = self._stream
+        if stream is None or time.time() < self._next_poll:
+            return
+        done = stream.done
+        chunks = stream.fetch()
+        if not chunks and not done:
+            return
+        start = time.time()
+        if done:
+            self._stream = None
+            if stream.error is not None:
+                logging.error('Failed loading the data tables with: %s',
+                              stream.error)
+                self.error = 'Failed loading the data tables. Press l to ' \
+                    'load them again.'
+                # the parts are unknown, so l reads the tables at once
+                self.loading = False
+                return
+        # only the new chunks are appended to the rows shown so far
+        raw_df = self.raw_df
+        if chunks:
+            raw_df = tables.concat([raw_df] + chunks)
+        self.raw_df = self._index_table(raw_df, encode=done)
+        new_columns = [c for c in self.raw_df.columns
+                       if c not in self._measured_col_width]
+        if done:
+            self._table_parts = [
+                tables.table_part(path, rows, self.table_format, stat)
+                for path, rows, stat in stream.parts
+            ]
+            self._measure_columns(self.raw_df.columns)
+            self._write_table_snapshot()
+            self._index_columns()
+            self.loading = False
+            logging.info('Finished loading the data tables.')
+        else:
+            self._measure_columns(new_columns)
+        self._refresh_rows()
+        self._next_poll = time.time() + 4 * (time.time() - start)
+
+    def _tagging_blocked(self):
+        if self.loading:
+            self.error = 'Tagging is disabled until the table is loaded.'
+        return self.loading
+
+    def _index_table(self, raw_df, encode=True):
+        for col in ['gse', 'id']:
+            if col not in raw_df.columns:
+                raise Exception('The sample table needs to have the '
+                                f'column "{col}".')
+        raw_df.index = uniquify(
+            raw_df['gse'].str.cat(raw_df['id'], sep='_')
+        )
+        smap_counts = raw_df['gse'].value_counts()
+        raw_df['n_sample'] = smap_counts[raw_df['gse']].values
+        if encode:
+            return tables.encode_categories(raw_df)
+        return raw_df
+
+    def _measure_columns(self, columns):
+        for col in columns:
+            l = tables.measure_width(self.raw_df[col], self.width_sample) + 1
+            self._measured_col_width[col] = int(max(l, len(col)))
+
+    def _write_table_snapshot(self):
+        if not self.table_snapshot:
+            return
+        key = self._part_key()
+        try:
+            with tables.snapshot_lock(self.table_snapshot):
+                tables.write_snapshot(self.table_snapshot, key, self.raw_df,
+                                      col_widths=self._measured_col_width,
+                                      parts=self._table_parts)
+        except (OSError, TypeError, ValueError) as e:
+            logging.warning('Could not write the table snapshot %s: %s',
+                            self.table_snapshot, e)
+
+    def _index_columns(self, columns=None):
+        """ Adds the new distinct values of the string ``columns``, or of all
+        string columns of the table, to their trigram indexes. """
+        if not self.search_index:
+            return
+        for col in self.raw_df.columns if columns is None else columns:
+            values = self.raw_df[col]
+            if pd.api.types.is_numeric_dtype(values.dtype):
+                continue
+            file = None
+            if self._ngram_dir:
+                file = ngrams.path(self._ngram_dir, col)
+            index = self._ngrams.get(col)
+            if index is None and file and self._reuse_ngrams and \
+                    os.path.exists(file):
+                index = ngrams.TrigramIndex.load(file)
+            if index is None:
+                index = ngrams.TrigramIndex()
+            added = index.extend(filters.distinct(values)[1])
+            self._ngrams[col] = index
+            if added:
+                logging.info('Indexed %d new values of %s.', added, col)
+            if added and file:
+                try:
+                    index.save(file)
+                except OSError as e:
+                    logging.warning('Could not write the search index %s: '
+                                    '%s', file, e)
+
+    def reload_table(self):
+        """ Re-reads changed tables and only refreshes the affected rows.
+
+        Tables that only grew are read from where the last read stopped.
+        """
+        paths = [os.path.abspath(table) for table in self.tables]
+        if self.df is None or \
+                [p['path'] for p in self._table_parts] != paths:
+            self.load_table()
+            return
+        changes = [tables.table_change(part) for part in self._table_parts]
+        if all(change == 'same' for change in changes):
+            logging.info('The data tables are unchanged.')
+            return
+        self.stdscr.addstr(0, 0, 'Reloading the table ...')
+        self.stdscr.refresh()
+        logging.info('Reloading changed data tables.')
+        try:
+            base = self.raw_df.drop(columns='n_sample')
+            loaded = set(base.columns)
+            frames = list()
+            parts = list()
+            start = 0
+            for part, change in zip(self._table_parts, changes):
+                old = base.iloc[start:start + part['rows']]
+                start += part['rows']
+                if change == 'same':
+                    frames.append(old)
+                    parts.append(part)
+                    continue
+                logging.info('Reading %s rows of %s.', change, part['path'])
+                stat = os.stat(part['path'])
+                if change == 'appended':
+                    df = tables.read_appended(part, loaded, self.where)
+                    df = tables.concat([old, df.reindex(columns=base.columns)])
+                else:
+                    df = tables.read_table(part['path'], loaded, self.where,
+                                           part['format'])
+                frames.append(df)
+                parts.append(tables.table_part(part['path'], len(df),
+                                               part['format'], stat))
+            raw_df = self._index_table(tables.concat(frames))
+        except Exception as e:
+            logging.error('Failed reloading the data tables with: %s', e)
+            self.error = 'Failed reloading the data tables.'
+            return
+        old_df = self.raw_df
+        self.raw_df = raw_df
+        self._table_parts = parts
+        catalog = self._read_catalog(parts)
+        new_columns = [c for c in catalog if c not in self._column_catalog]
+        self._column_catalog = catalog
+        if new_columns or len(raw_df.columns) != len(old_df.columns):
+            for col in new_columns:
+                self.ordered_columns.append(col)
+                self.show_columns.add(col)
+            self._update_now = True
+        else:
+            common = raw_df.index.intersection(old_df.index)
+            new = raw_df.loc[common].astype(object)
+            old = old_df.loc[common, raw_df.columns].astype(object)
+            differs = (new != old) & ~(new.isna() & old.isna())
+            stale = common[differs.any(axis=1)]
+            stale = stale.append(raw_df.index.difference(old_df.index))
+            self._refresh_rows(stale)
+        self._write_table_snapshot()
+        self._index_columns()
+
+    def _refresh_rows(self, stale=None):
+        """ Updates the view and keeps formatted lines of unchanged rows.
+
+        All rows count as changed if ``stale`` is None.
+        """
+        labels = self.df.index
+        pointer = labels[self.pointer]
+        selection = labels[list(self.selection)]
+        formatted = self.lines.items()
+        self.update_df()
+        self._reset_lines()
+        if stale is not None and formatted:
+            rows = [row for row, _ in formatted]
+            keep = ~labels[rows].isin(stale)
+            new_pos = self.df.index.get_indexer(labels[rows])
+            for (_, line), new, k in zip(formatted, new_pos, keep):
+                if k and new >= 0:
+                    self.lines[new] = line
+            logging.info('Refreshed %d changed rows.', len(stale))
+        pos = self.df.index.get_indexer([pointer])[0]
+        self.pointer = pos if pos >= 0 else min(self.pointer,
+                                                self.total_lines - 1)
+        selection = self.df.index.get_indexer(selection)
+        self.selection = set(int(i) for i in selection if i >= 0)
+        self.selection.add(self.pointer)
+
     def reset_cols(self):
         ordered_columns = ['id']
         ordered_columns += list(self.tags.keys())
@@ -305,7 +742,7 @@ class App:
             'col',
             'val'
         ]
-        all_columns = set(self.raw_df.columns).union(set(self.tags.keys()))
+        all_columns = set(self._column_catalog).union(set(self.tags.keys()))
         ordered_columns = [c for c in ordered_columns if c in all_columns]
         for c in all_columns:
             if c not in ordered_columns:
@@ -321,44 +758,244 @@ class App:
         else:
             self.print_help = not self.print_help
 
-    def update_df(self):
-        r = self.raw_df.copy()
-        data_frames = [self.raw_df.copy()]
-        for col, tags in self.tag_data.items():
-            tagd = pd.DataFrame.from_dict(tags, orient='index', columns=[col],
-                                          dtype=locate(self.tags[col]['type']))
-            data_frames.append(tagd)
-        r = pd.concat(data_frames, axis=1, join='outer', sort=False)\
-            .fillna(self.missing_data_value)
-        for col, filter in self.filter.items():
-            r = r[r[col].astype(str).str.contains(filter)]
-        if self.sort_columns or self.sort_reverse_columns:
-            sort_cols = self.sort_columns.union(self.sort_reverse_columns)
-            sc = [c for c in self.ordered_columns if c in sort_cols]
-            ascending = [True if c in self.sort_columns else False for c in sc]
-            r = r.sort_values(sc, ascending=ascending)
-        cols = [c for c in self.ordered_columns if c in self.show_columns]
-        r = r[cols]
-        if r.empty:
+    def _touch_tags(self, *tags, ids=None):
+        """ Marks the data of ``tags`` as changed for the view pipeline.
+
+        ``ids`` are the changed samples if only these changed.
+        """
+        for tag in tags:
+            version = next(self._versions)
+            self._tag_versions[tag] = version
+            if ids is None:
+                self._value_positions[1].pop(tag, None)
+            if ids is not None:
+                ids = np.asarray(ids, dtype=object)
+            # only changes after the oldest cached sort are asked for
+            held = [token[1] for token in self._sorts.tokens(tag)
+                    if token[1] is not None]
+            oldest = min(held, default=version)
+            changes = [change for change in self._tag_changes.get(tag, [])
+                       if change[0] > oldest]
+            changes.append((version, ids))
+            self._tag_changes[tag] = changes
+
+    def _changed_rows(self, col, old_token, token):
+        """ Returns the rows of the merged index that changed in ``col``
+        between two of its tokens or None if that is unknown. """
+        if old_token[0] != token[0] or old_token[1] is None:
+            return None
+        ids = [np.empty(0, dtype=object)]
+        for version, changed in self._tag_changes.get(col, []):
+            if old_token[1] < version <= token[1]:
+                if changed is None:
+                    return None
+                ids.append(changed)
+        rows = self._stages['merge'][1][2].get_indexer(
+            pd.Index(np.concatenate(ids), dtype=object))
+        return rows[rows >= 0]
+
+    def _stage(self, name, inputs, compute):
+        """ Returns the cached result of the stage ``name`` if it was computed
+        from the same ``inputs`` and else recomputes it. """
+        cached = self._stages.get(name)
+        if cached is not None and cached[0] == inputs:
+            return cached[1]
+        result = compute()
+        self._stages[name] = (inputs, result)
+        return result
+
+    def _merge(self):
+        """ Returns the index of the table rows followed by tagged samples that
+        are not in the table and a version of that index. """
+        previous = self._stages.get('merge')
+        self.tag_data.align(self.raw_df.index)
+        extra = pd.Index(self.tag_data.extra_ids(), dtype=object)
+        if previous is not None and previous[1][0] is self.raw_df and \
+                previous[1][1].equals(extra):
+            return previous[1]
+        index = self.raw_df.index
+        if len(extra):
+            index = index.append(extra)
+        self._column_cache = dict()
+        self._masks.clear()
+        self._sorts.clear()
+        return self.raw_df, extra, index, next(self._versions)
+
+    def _column_token(self, col):
+        return self._stages['merge'][1][3], self._tag_versions.get(col)
+
+    def _view_column(self, col):
+        """ Returns the column ``col`` with all rows of the merged index and
+        missing values filled. """
+        token = self._column_token(col)
+        cached = self._column_cache.get(col)
+        if cached is not None and cached[0] == token:
+            return cached[1]
+        _, extra, index, _ = self._stages['merge'][1]
+        if col in self.tag_data:
+            values = self.tag_data[col].view(index, self.missing_data_value)
+            self._column_cache[col] = (token, values)
+            return values
+        values = self.raw_df[col]
+        if len(extra):
+            indexer = np.arange(len(index))
+            indexer[len(values):] = -1
+            values = pd.Series(pd.api.extensions.take(
+                values.values, indexer, allow_fill=True), index=index)
+        if isinstance(values.dtype, pd.CategoricalDtype) and \
+                self.missing_data_value not in values.cat.categories \
+                and values.isna().any():
+            categories = values.cat.categories.append(
+                pd.Index([self.missing_data_value]))
+            values = values.cat.set_categories(sorted(categories))
+        if values.isna().any():
+            values = values.fillna(self.missing_data_value)
+        self._column_cache[col] = (token, values)
+        return values
+
+    def _available_columns(self, columns):
+        return [c for c in columns
+                if c in self.raw_df.columns or c in self.tag_data]
+
+    def _filtered_rows(self):
+        masks = list()
+        for col in self._available_columns(sorted(self.filter)):
+            pattern = self.filter[col]
+            try:
+                masks.append(self._masks.mask(col, self._column_token(col),
+                                              self._view_column(col), pattern,
+                                              self._ngrams.get(col)))
+            except re.error as e:
+                logging.error('Invalid filter "%s" for "%s": %s',
+                              pattern, col, e)
+                self.error = f'Invalid filter for {col}: {e}'
+        return filters.combine(masks, len(self._stages['merge'][1][2]))
+
+    def _sort_order(self):
+        sort_cols = self.sort_columns.union(self.sort_reverse_columns)
+        return tuple((c, c in self.sort_columns)
+                     for c in self._available_columns(self.ordered_columns)
+                     if c in sort_cols)
+
+    def _sorted_rows(self, rows, order):
+        """ Returns the ``rows`` in the cached permutation of all rows. """
+        if not order:
+            return rows
+        tokens = tuple(self._column_token(col) for col, _ in order)
+        permutation = self._sorts.permutation(order, tokens, self._view_column,
+                                              self._changed_rows)
+        if len(rows) == len(permutation):
+            return permutation
+        keep = np.zeros(len(permutation), dtype=bool)
+        keep[rows] = True
+        return permutation[keep[permutation]]
+
+    def _projected_df(self, sort_key, rows, cols):
+        if len(rows) == 0:
             logging.debug('No entries match the filter.')
-            r = pd.DataFrame({
+            return pd.DataFrame({
                 'id': ['none'],
                 'gse': ['None']
             })
-        self.df = r
+        # reuse the columns of the previous projection of the same rows
+        previous = self._stages.get('project')
+        reusable = dict()
+        index = self._stages['merge'][1][2][rows]
+        if previous is not None and previous[0][0] == sort_key:
+            _, previous_cols, tokens = previous[0]
+            reusable = {c: t for c, t in zip(previous_cols, tokens)}
+            index = previous[1].index
+        data = dict()
+        for col in cols:
+            if reusable.get(col, False) == self._column_token(col):
+                values = previous[1][col]
+            else:
+                values = self._view_column(col)
+                # a copy in view order, even of memory-mapped columns
+                values = pd.Series(values.values.take(rows), index=index,
+                                   dtype=values.dtype, copy=False)
+            data[col] = values
+        return pd.DataFrame(data, index=index, columns=cols, copy=False)
+
+    def _colormap(self, r):
         if self.color_by not in r.columns:
-            self.coloring_now = False
-            return
-        self.coloring_now = self.color_by
+            return False, lambda x: None
         tag_type = self.tags.get(self.color_by, dict()).get('type', '')
         if tag_type == 'int' or \
                 pd.api.types.is_numeric_dtype(r[self.color_by].dtype):
-            self.colmap = lambda x: \
-                99 if x == self.missing_data_value else int(x % 10) + 1
+            def colmap(x):
+                if x == self.missing_data_value:
+                    return 99
+                return None if pd.isna(x) else int(x % 10) + 1
+        elif isinstance(r[self.color_by].dtype, pd.CategoricalDtype):
+            values = r[self.color_by].cat.remove_unused_categories()
+            colors = np.arange(len(values.cat.categories)) % 10 + 1
+            cmap = dict(zip(values.cat.categories, colors.tolist()))
+            colmap = cmap.get
         else:
-            cmap = {key: i % 10 + 1 for i, key in
-                    enumerate(sorted(set(r[self.color_by]) - {None}))}
-            self.colmap = cmap.get
+            values = set(pd.unique(r[self.color_by].values)) - {None}
+            try:
+                values = sorted(values)
+            except TypeError:
+                # mixed types, e.g., numbers and the missing data value
+                values = sorted(values, key=str)
+            cmap = {key: i % 10 + 1 for i, key in enumerate(values)}
+            colmap = cmap.get
+        return self.color_by, colmap
+
+    @staticmethod
+    def _color_pairs(values, colmap):
+        """ Returns the color pair of each value as int8 and 0 if it has
+        none. """
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        pairs = [colmap(value) for value in uniques]
+        return np.asarray([p or 0 for p in pairs], dtype=np.int8)[codes]
+
+    def _row_colors(self):
+        """ Returns the color pairs of the rows of the view. """
+        df, colmap, colors = self._colors
+        if df is not self.df or colmap is not self.colmap:
+            colors = np.zeros(len(self.df), dtype=np.int8)
+            if self.coloring_now in self.df.columns:
+                colors = self._color_pairs(self.df[self.coloring_now],
+                                           self.colmap)
+            self._colors = (self.df, self.colmap, colors)
+        return colors
+
+    def update_df(self):
+        """ Builds the view ``self.df`` in the stages merge, filter, sort,
+        project and colormap.
+
+        Each stage is only recomputed if its inputs changed, e.g., a new
+        ``color_by`` only recomputes the colormap and a new filter pattern
+        only the mask of its column.
+        """
+        needed = self.show_columns | self.sort_columns | \
+            self.sort_reverse_columns | set(self.filter) | {self.color_by}
+        self._require_columns(needed)
+        self._stages['merge'] = (None, self._merge())
+        # the rows change with the merged index even without filters
+        filter_key = (self._stages['merge'][1][3], tuple(sorted(
+            (col, pattern, self._column_token(col))
+            for col, pattern in self.filter.items()
+        )))
+        rows = self._stage('filter', filter_key, self._filtered_rows)
+        order = self._sort_order()
+        sort_key = (filter_key, order,
+                    tuple(self._column_token(col) for col, _ in order))
+        rows = self._stage('sort', sort_key,
+                           lambda: self._sorted_rows(rows, order))
+        cols = [c for c in self._available_columns(self.ordered_columns)
+                if c in self.show_columns]
+        project_key = (sort_key, tuple(cols),
+                       tuple(self._column_token(c) for c in cols))
+        self.df = self._stage('project', project_key,
+                              lambda: self._projected_df(sort_key, rows,
+                                                         cols))
+        color_key = (project_key, self.color_by,
+                     self.tags.get(self.color_by, dict()).get('type'))
+        self.coloring_now, self.colmap = self._stage(
+            'colormap', color_key, lambda: self._colormap(self.df))
 
     def _init_curses(self):
         curses.use_default_colors()
@@ -400,26 +1037,49 @@ class App:
         )
 
     def update_content(self):
+        df = self.df
         self.update_df()
-        self._reset_lines()
+        if self.df is not df:
+            self._reset_lines()
 
     def _reset_lines(self):
         self.header = self._str_from_line()
         self.total_lines = self.df.shape[0]
-        self.lines = ['-'] * self.total_lines
-        self.stale_lines = set(range(self.total_lines))
+        self.lines.clear()
         if self.pointer > self.total_lines:
             self.pointer = 0
             self.selection = {self.pointer}
 
-    def update_lines(self, line_numbers):
-        locs = set(line_numbers).intersection(self.stale_lines)
-        if not locs:
+    def update_lines(self, line_numbers, widths=None):
+        """ Formats the missing lines among ``line_numbers`` and prefetches
+        those in one block of the same size above and below them.
+
+        Only the columns in the pairs of column and width ``widths`` are
+        formatted. All lines are dropped if these columns change.
+        """
+        if widths is None:
+            widths = list(self.col_widths())
+        if widths != self._line_columns:
+            self.lines.clear()
+            self._line_columns = widths
+        if not line_numbers:
+            return
+        start = max(0, min(line_numbers))
+        stop = min(self.total_lines, max(line_numbers) + 1)
+        if all(row in self.lines for row in range(start, stop)):
             return
-        ordered_locs = list(locs)
-        for j in ordered_locs:
-            self.lines[j] = self._str_from_line(self.df.iloc[j, :])
-        self.stale_lines -= locs
+        size = stop - start
+        # the shown lines must not be evicted by those prefetched with them
+        self.lines.reserve(3 * size)
+        block = range(max(0, start - size), min(self.total_lines, stop + size))
+        ordered_locs = [row for row in block if row not in self.lines]
+        int_columns = {tag for tag, info in self.tags.items()
+                       if info.get('type') == 'int'}
+        lines = formatting.format_lines(
+            self.df, ordered_locs, widths, int_columns,
+            self.column_seperator, self.missing_data_value)
+        for j, line in zip(ordered_locs, lines):
+            self.lines[j] = line
 
     def run(self, stdscr):
         self._init_curses()
@@ -431,7 +1091,15 @@ class App:
             if self._update_now:
                 self.update_content()
                 self._update_now = False
+            self._poll_stream()
+            self._poll_search()
             curses.update_lines_cols()
+            self._screen.resize(curses.LINES, curses.COLS)
+            overlay = self.print_help or self.in_dialog or \
+                self.in_tag_dialog
+            if overlay != self._overlay:
+                self._screen.invalidate()
+                self._overlay = overlay
             padding = ' ' * curses.COLS
             nlines = curses.LINES - 4
             if self.pointer > self.total_lines - 1:
@@ -441,12 +1109,15 @@ class App:
             self.top = self.pointer - nlines \
                 if self.pointer >= self.top + nlines else self.top
             tabcols = curses.COLS
-            cols = slice(self.lrpos, self.lrpos + tabcols)
+            pinned, visible, offset = self._layout(tabcols)
+            prefix = sum(w + len(self.column_seperator) for _, w in pinned)
+            cols = slice(prefix + offset, offset + tabcols)
             button = self.top + nlines
             viewed_lines = range(self.top, button + 1)
-            self.update_lines(viewed_lines)
-            self._print_body(self.header, self.lines, nlines, cols)
-            curses.setsyx(nlines + 2, 0)
+            self.update_lines(viewed_lines, pinned + visible)
+            header = self.column_seperator.join(
+                self._format(col, None, w) for col, w in pinned + visible)
+            self._print_body(header, self.lines, nlines, cols, prefix=prefix)
             if len(self.selection) == 1:
                 sel_status = str(self._id_for_index(self.pointer))
             else:
@@ -460,6 +1131,18 @@ class App:
                 ('tagging', self.current_tag, 100),
                 ('selected', sel_status, 100),
             ]
+            if self._stream is not None:
+                progress = f'{int(100 * self._stream.progress)}%'
+                status_bar.append(('loading', progress, 104))
+            if self.where:
+                status_bar.append(('where', self.where_text, 104))
+            if self._searching():
+                search = self._search[2]
+                found = len(search.result()[0])
+                status_bar.append(('searching', f'{int(100 * search.progress)}'
+                                   f'% {found} matches', 104))
+            if self.count_prefix is not None:
+                status_bar.append(('count', ':' + self.count_prefix, 104))
             if cn and self.showKey:
                 status_bar.append(('key', str(cn), 100))
             if stack().canundo():
@@ -469,55 +1152,136 @@ class App:
             if self.error:
                 status_bar = [('error', self.error, 102)] + status_bar
                 self.error = ''
-            for name, content, color in status_bar:
-                name = f' {name}: '
-                y, x = stdscr.getyx()
-                space = curses.COLS - 1 - x
-                if y < curses.LINES - 1:  # we have an extra line
-                    space += curses.COLS - 1
-                if len(name) > space:
-                    if space < 4:
-                        stdscr.addstr(' ...'[:space])
-                        break
-                    stdscr.addstr(name[:(space - 4)] + ' ...',
-                                  curses.color_pair(color))
-                    break
-                stdscr.addstr(name, curses.color_pair(color))
-                y, x = stdscr.getyx()
-                space = curses.COLS - 1 - x
-                if y < curses.LINES - 1:  # we have an extra line
-                    space += curses.COLS - 1
-                if content and len(content) > space:
-                    if space < 4:
-                        stdscr.addstr(' ...'[:space])
-                        break
-                    stdscr.addstr(content[:(space - 4)] + ' ...')
-                    break
-                stdscr.addstr(content)
-            y, x = stdscr.getyx()
-            stdscr.addstr(' ' * (curses.COLS - x - 1))
-            if y < curses.LINES - 1:
-                # clear last line
-                stdscr.addstr(' ' * (curses.COLS - 1))
+            self._screen.draw_segments(
+                stdscr, nlines + 2, self._status_segments(status_bar,
+                                                          nlines + 2))
             if self.print_help:
                 self._print_help()
             if self.in_dialog:
                 self._view_dialog()
             elif self.in_tag_dialog:
                 self._view_tag_dialog()
+            stdscr.noutrefresh()
+            if overlay:
+                self.win.noutrefresh()
+            curses.doupdate()
+            busy = self._stream is not None or self._searching()
+            stdscr.timeout(100 if busy else -1)
             if not self.add_tag:
-                cn = self.get_key(stdscr)
+                keys = self._pending_keys(stdscr)
             else:
-                cn = b''
+                keys = [b'']
                 self.add_tag = False
-            if cn == b'q':
+            cn = keys[-1]
+            if not self._handle_keys(keys, nlines, tabcols):
                 break
+
+    def _pending_keys(self, win):
+        """ Waits for a key and returns it with all keys that are already
+        queued behind it. Reading stops after a key that may prompt for
+        input, so the prompt gets the keys typed after it. """
+        keys = [self.get_key(win)]
+        win.timeout(0)
+        try:
+            while keys[-1] and keys[-1] in self._quiet_keys:
+                cn = self.get_key(win)
+                if not cn:
+                    break
+                keys.append(cn)
+        finally:
+            # prompts read from the window and need to wait for their key
+            win.timeout(-1)
+        return keys
+
+    def _handle_keys(self, keys, nlines, tabcols):
+        """ Reacts to the ``keys`` of one frame and returns False to quit.
+
+        Runs of the same movement key outside of the dialogs are folded into
+        one move and digits after ":" are a count for the next key, e.g.,
+        ":25" and Down moves down 25 rows.
+        """
+        i = 0
+        while i < len(keys):
+            cn = keys[i]
+            i += 1
+            count = 1
+            if cn:
+                # any key stops a search that is waited for
+                self._cancel_search()
+            if self.count_prefix is not None:
+                if cn in self._byte_numbers:
+                    self.count_prefix += cn.decode()
+                    continue
+                count = int(self.count_prefix or 1)
+                self.count_prefix = None
+                if cn == b'\x1b':
+                    continue
+            in_dialog = self.in_dialog or self.in_tag_dialog
+            if cn in self._movement_keys and not in_dialog:
+                # the dialogs move by one entry per key
+                while i < len(keys) and keys[i] == cn:
+                    count += 1
+                    i += 1
+            if cn == b'q':
+                return False
+            if cn not in self._quiet_keys:
+                # the key may draw around the screen model, e.g., a prompt
+                self._screen.invalidate()
             if self.in_dialog:
-                self._dialog(cn)
+                for _ in range(count):
+                    self._dialog(cn)
             elif self.in_tag_dialog:
-                self._tag_dialog(cn)
+                for _ in range(count):
+                    self._tag_dialog(cn)
+            elif cn == b':':
+                self.count_prefix = ''
+            elif cn in self._movement_keys or cn == b'd':
+                self._react(cn, nlines, tabcols, count)
             else:
-                self._react(cn, nlines, tabcols)
+                for _ in range(count):
+                    self._react(cn, nlines, tabcols)
+        return True
+
+    def _status_segments(self, status_bar, y):
+        """ Returns the texts and attributes of the ``status_bar`` starting at
+        the beginning of row ``y``. Long entries are cut with "...". """
+        segments = list()
+        x = 0
+
+        def add(text, attr=curses.A_NORMAL):
+            nonlocal x, y
+            segments.append((text, attr))
+            y, x = y + (x + len(text)) // curses.COLS, \
+                (x + len(text)) % curses.COLS
+
+        def space():
+            space = curses.COLS - 1 - x
+            if y < curses.LINES - 1:  # we have an extra line
+                space += curses.COLS - 1
+            return space
+
+        for name, content, color in status_bar:
+            name = f' {name}: '
+            if len(name) > space():
+                if space() < 4:
+                    add(' ...'[:space()])
+                    break
+                add(name[:(space() - 4)] + ' ...', curses.color_pair(color))
+                break
+            add(name, curses.color_pair(color))
+            if content and len(content) > space():
+                if space() < 4:
+                    add(' ...'[:space()])
+                    break
+                add(content[:(space() - 4)] + ' ...')
+                break
+            add(content)
+        last_y = y
+        add(' ' * (curses.COLS - x - 1))
+        if last_y < curses.LINES - 1:
+            # clear last line
+            add(' ' * (curses.COLS - 1))
+        return segments
 
     def get_key(self, win):
         def get():
@@ -544,30 +1308,60 @@ class App:
                 next_c = get().encode()
         return cn + next_c
 
-    def _print_body(self, header, lines, nlines, cols, y0=0, x0=0):
+    def _layout(self, tabcols):
+        """ Returns the pinned columns, the scrolled columns that overlap the
+        ``tabcols`` wide window at ``lrpos`` and the position of the window in
+        the line of these scrolled columns. Columns are pairs of a name and
+        a width. """
+        widths = list(self.col_widths())
+        pinned = list()
+        if self.pin_columns:
+            pinned = [(col, w) for col, w in widths
+                      if col in ('id', self.current_tag)]
+        sep = len(self.column_seperator)
+        space = tabcols - sum(w + sep for _, w in pinned)
+        visible = list()
+        start = 0
+        first = None
+        for col, w in widths:
+            if (col, w) in pinned:
+                continue
+            if start + w + sep > self.lrpos and start < self.lrpos + space:
+                if first is None:
+                    first = start
+                visible.append((col, w))
+            start += w + sep
+        if first is None:
+            # the window is right of the end of the lines
+            first = max(0, start - sep)
+        return pinned, visible, self.lrpos - first
+
+    def _print_body(self, header, lines, nlines, cols, y0=0, x0=0,
+                    prefix=0):
+        """ Draws the ``header`` and ``lines`` with the first ``prefix``
+        characters pinned and the rest cut to the slice ``cols``. """
         padding = ' ' * curses.COLS
         h = header + padding
-        self.stdscr.addstr(y0, x0, h[cols])
+        self._screen.draw(self.stdscr, y0, x0,
+                          (h[:prefix] + h[cols])[:curses.COLS])
+        colors = self._row_colors()
         for i in range(nlines + 1):
             pos = i + self.top
             attr = curses.A_REVERSE if self.is_selected(
                 pos) else curses.A_NORMAL
-            if pos >= self.total_lines or pos > len(lines):
-                self.stdscr.addstr(y0 + i + 1, 0, padding)
+            if pos >= self.total_lines or pos not in lines:
+                self._screen.draw(self.stdscr, y0 + i + 1, 0, padding)
                 continue
-            if self.coloring_now in self.df.columns and \
-                    len(self.df[self.coloring_now]) > pos:
-                val = self.df[self.coloring_now].iloc[pos]
-                if val is not None:
-                    col = self.colmap(val)
-                    attr |= curses.color_pair(col)
-            text = lines[pos] + padding
-            self.stdscr.addstr(y0 + i + 1, x0, text[cols], attr)
+            if pos < len(colors) and colors[pos]:
+                attr |= curses.color_pair(int(colors[pos]))
+            text = lines.get(pos) + padding
+            self._screen.draw(self.stdscr, y0 + i + 1, x0,
+                              (text[:prefix] + text[cols])[:curses.COLS], attr)
 
     def is_selected(self, pointer):
         return pointer in self.selection
 
-    def _react(self, cn, nlines, tabcols):
+    def _react(self, cn, nlines, tabcols, count=1):
         if cn == b'\x01':  # CTRL + a
             self.selection = set(range(self.total_lines))
         elif cn == b'h':
@@ -580,7 +1374,10 @@ class App:
             self.load_tag_definitions()
             self.in_tag_dialog = True
         elif cn == b'l':
-            self.load_table()
+            if self.loading:
+                self.error = 'The table is still loading.'
+            else:
+                self.reload_table()
         elif cn == b's':
             self.stdscr.addstr(
                 0, 0, 'Saving ...'.ljust(
@@ -590,65 +1387,95 @@ class App:
         elif cn == b'o':
             os.system('tmux select-layout main-vertical')
         elif cn == b'KEY_UP':
-            self.pointer -= 1
+            self.pointer -= count
             self.pointer %= self.total_lines
             self.selection = {self.pointer}
         elif cn == b'KEY_DOWN':
-            self.pointer += 1
+            self.pointer += count
             self.pointer %= self.total_lines
             self.selection = {self.pointer}
         elif cn == b'KEY_SR' or cn == b'\x1b[1;2A':
-            old_pointer = self.pointer
-            self.pointer -= 1
-            self.pointer %= self.total_lines
-            if self.pointer in self.selection:
-                self.selection.remove(old_pointer)
-            self.selection.add(self.pointer)
+            for _ in range(count):
+                old_pointer = self.pointer
+                self.pointer -= 1
+                self.pointer %= self.total_lines
+                if self.pointer in self.selection:
+                    self.selection.remove(old_pointer)
+                self.selection.add(self.pointer)
         elif cn == b'KEY_SF' or cn == b'\x1b[1;2B':  # Shift + Down
-            old_pointer = self.pointer
-            self.pointer += 1
-            self.pointer %= self.total_lines
-            if self.pointer in self.selection:
-                self.selection.remove(old_pointer)
-            self.selection.add(self.pointer)
-        elif cn == b'\x1b[1;5A':  # Ctrl + Up
-            tags = self.df[self.current_tag].iloc[:self.pointer + 1]
-            candidates = tags.index[tags == self.missing_data_value]
-            if len(candidates) > 0:
-                self.pointer = self.df.index.get_loc(candidates[-1])
-                self.selection = {self.pointer}
-            else:
+            for _ in range(count):
+                old_pointer = self.pointer
+                self.pointer += 1
+                self.pointer %= self.total_lines
+                if self.pointer in self.selection:
+                    self.selection.remove(old_pointer)
+                self.selection.add(self.pointer)
+        elif cn in (b'\x1b[1;5A', b'\x1b[1;6A'):  # Ctrl (+ Shift) + Up
+            row = self._jump(self.missing_data_value, -1)
+            if row is None:
                 self.error = 'No untagged entries above.'
-        elif cn == b'\x1b[1;5B':  # Ctrl + Down
-            tags = self.df[self.current_tag].iloc[self.pointer:]
-            candidates = tags.index[tags == self.missing_data_value]
-            if len(candidates) > 0:
-                self.pointer = self.df.index.get_loc(candidates[0])
+            elif cn == b'\x1b[1;5A':
+                self.pointer = row
                 self.selection = {self.pointer}
             else:
-                self.error = 'No untagged entries below.'
-        elif cn == b'\x1b[1;6A':  # Ctrl + Shift + Up
-            tags = self.df[self.current_tag].iloc[:self.pointer + 1]
-            candidates = tags.index[tags == self.missing_data_value]
-            if len(candidates) > 0:
-                self.pointer = self.df.index.get_loc(candidates[-1])
+                self.pointer = row
                 self.selection.add(self.pointer)
+        elif cn in (b'\x1b[1;5B', b'\x1b[1;6B'):  # Ctrl (+ Shift) + Down
+            row = self._jump(self.missing_data_value, 1)
+            if row is None:
+                self.error = 'No untagged entries below.'
+            elif cn == b'\x1b[1;5B':
+                self.pointer = row
+                self.selection = {self.pointer}
             else:
-                self.error = 'No untagged entries above.'
-        elif cn == b'\x1b[1;6B':  # Ctrl + Shift + Down
-            tags = self.df[self.current_tag].iloc[self.pointer:]
-            candidates = tags.index[tags == self.missing_data_value]
-            if len(candidates) > 0:
-                self.pointer = self.df.index.get_loc(candidates[0])
+                self.pointer = row
                 self.selection.add(self.pointer)
+        elif cn in (b'[', b']'):
+            step = 1 if cn == b']' else -1
+            row = self.pointer
+            for _ in range(count):
+                other = self._jump(None, step, start=row)
+                if other is None:
+                    break
+                row = other
+            if row == self.pointer:
+                self.error = 'No entries with other tag info ' + \
+                    ('below.' if step > 0 else 'above.')
             else:
-                self.error = 'No untagged entries below.'
+                self.pointer = row
+                self.selection = {self.pointer}
+        elif cn == b'=':
+            xpos = 2
+            ypos = 2
+            hight = 1
+            text = f'{self.current_tag}:'
+            width = min(curses.COLS - 2 - xpos, 80 + len(text))
+            rectangle(self.stdscr, ypos - 1, xpos - 1,
+                      ypos + hight, xpos + width)
+            self.stdscr.addstr(ypos, xpos, text)
+            editwin = self.stdscr.subwin(hight, width - len(text),
+                                         ypos, xpos + len(text))
+            editwin.clear()
+            editwin.addstr(self.jump_value or '')
+            self.stdscr.refresh()
+            box = Textbox(editwin)
+            try:
+                box.edit()
+            except KeyboardInterrupt:
+                return
+            self.jump_value = box.gather().strip()
+            self._jump_to_value(1)
+        elif cn in (b'{', b'}'):
+            step = 1 if cn == b'}' else -1
+            for _ in range(count):
+                if not self._jump_to_value(step):
+                    break
         elif cn == b'g':
             xpos = 2
             ypos = 2
             hight = 1
-            text = 'position:'
-            width = min(curses.COLS - 2 - xpos, 10 + len(text))
+            text = 'position or accession:'
+            width = min(curses.COLS - 2 - xpos, 30 + len(text))
             rectangle(self.stdscr, ypos - 1, xpos - 1,
                       ypos + hight, xpos + width)
             self.stdscr.addstr(ypos, xpos, text)
@@ -661,19 +1488,13 @@ class App:
                 box.edit()
             except KeyboardInterrupt:
                 return
-            val = box.gather().strip()
-            if not val.isnumeric():
-                self.error = 'The entered position is not numeric.'
-            else:
-                self.pointer = min(self.total_lines - 1,
-                                   max(0, int(float(val))))
-                self.selection = {self.pointer}
+            self._go_to(box.gather().strip())
         elif cn == b'G':
             xpos = 2
             ypos = 2
             hight = 1
-            text = 'position (add):'
-            width = min(curses.COLS - 2 - xpos, 10 + len(text))
+            text = 'position or accession (add):'
+            width = min(curses.COLS - 2 - xpos, 30 + len(text))
             rectangle(self.stdscr, ypos - 1, xpos - 1,
                       ypos + hight, xpos + width)
             self.stdscr.addstr(ypos, xpos, text)
@@ -686,31 +1507,26 @@ class App:
                 box.edit()
             except KeyboardInterrupt:
                 return
-            val = box.gather().strip()
-            if not val.isnumeric():
-                self.error = 'The entered position is not numeric.'
-            else:
-                self.pointer = min(self.total_lines - 1,
-                                   max(0, int(float(val))))
-                self.selection.add(self.pointer)
+            self._go_to(box.gather().strip(), add=True)
         elif cn == b' ':
             self.pointer = random.randint(0, self.total_lines - 1)
             self.selection = {self.pointer}
         elif cn == b'KEY_LEFT':
-            if self.lrpos > 0:
-                self.lrpos -= 1
+            self.lrpos = max(0, self.lrpos - count)
         elif cn == b'KEY_SLEFT' or cn == b'\x1b[1;2D':
-            self.lrpos = max(0, self.lrpos - int(tabcols / 2))
+            self.lrpos = max(0, self.lrpos - count * int(tabcols / 2))
         elif cn == b'KEY_RIGHT':
-            self.lrpos += 1
+            self.lrpos += count
         elif cn == b'KEY_SRIGHT' or cn == b'\x1b[1;2C':
-            self.lrpos = self.lrpos + int(tabcols / 2)
+            self.lrpos = self.lrpos + count * int(tabcols / 2)
+        elif cn == b'p':
+            self.pin_columns = not self.pin_columns
         elif cn == b'KEY_PPAGE':
-            self.top = max(self.top - nlines, 0)
+            self.top = max(self.top - count * nlines, 0)
             self.pointer = self.top
             self.selection = {self.pointer}
         elif cn == b'KEY_NPAGE':
-            top = self.top + nlines
+            top = self.top + count * nlines
             self.pointer = min(top, self.total_lines - 1)
             self.top = min(self.total_lines - nlines - 1, top)
             self.selection = {self.pointer}
@@ -803,7 +1619,12 @@ class App:
                 d = 'd' if len(files) > 1 else ''
                 os.system(f'tmux split-window -{d}p {pane_size} -h {less}')
         elif cn == b'd':
-            self.del_tag_data(self.current_tag)
+            if count > 1:
+                self.pointer = min(self.pointer, self.total_lines - 1)
+                self.selection = set(range(
+                    self.pointer, min(self.pointer + count, self.total_lines)))
+            if not self._tagging_blocked():
+                self.del_tag_data(self.current_tag)
         elif cn == b'f':
             xpos = 2
             ypos = 2
@@ -846,73 +1667,110 @@ class App:
                 return
             self.search_string = box.gather().strip()
             logging.info('Searching all %s.', self.search_string)
-            try:
-                self.stdscr.addstr(
-                    0, 0, 'Searching all ...'.ljust(
-                        curses.COLS)[:curses.COLS - 1])
-                self.stdscr.refresh()
-                self.error = 'No match found.'
-                for index, (ind, line) in enumerate(self.df.iterrows()):
-                    h = line.astype(str).str.contains(self.search_string).any()
-                    if not h:
-                        continue
-                    self.error = ''
-                    self.selection.add(index)
-                    self.pointer = index
-            except KeyboardInterrupt:
-                logging.debug('Aborting the search.')
+            self._search_for('F')
         else:
             if self.tags[self.current_tag]['type'] == 'int' \
                     and cn in self._byte_numbers:
                 # set current tag to value
-                self.set_tag(self.current_tag, int(cn), self._view_state)
+                if not self._tagging_blocked():
+                    self.set_tag(self.current_tag, int(cn), self._view_state)
                 return
             for tag, info in self.tags.items():
                 if cn == b'\x1b' + info['key'].encode():
                     if info['type'] == 'int':
                         logging.info('Starting to tag %s.', tag)
                         self.current_tag = tag
-                    elif info['type'] == 'str':
+                    elif info['type'] == 'str' and \
+                            not self._tagging_blocked():
                         logging.info('Starting make a %s.', tag)
                         self.make_str(tag)
         if cn == b'n':
-            self.stdscr.addstr(
-                0, 0, 'Searching below ...'.ljust(
-                    curses.COLS)[:curses.COLS - 1])
-            self.stdscr.refresh()
             logging.info('Searching next %s.', self.search_string)
-            try:
-                reff = self.df.iloc[self.pointer::]
-                self.error = 'No match found below.'
-                for index, (ind, line) in enumerate(reff.iterrows()):
-                    h = line.astype(str).str.contains(self.search_string).any()
-                    if not h or index == 0:
-                        continue
-                    self.error = ''
-                    self.pointer += index
-                    self.selection = {self.pointer}
-                    break
-            except KeyboardInterrupt:
-                logging.debug('Aborting the search.')
+            self._search_for('n')
         elif cn == b'N':
-            self.stdscr.addstr(
-                0, 0, 'Searching above ...'.ljust(
-                    curses.COLS)[:curses.COLS - 1])
-            self.stdscr.refresh()
             logging.info('Searching previous %s.', self.search_string)
+            self._search_for('N')
+
+    def _search_for(self, action):
+        """ Runs the search ``action`` "n", "N" or "F" as soon as enough rows
+        are searched.
+
+        The search runs in the background and its hits are kept until the
+        view, the pattern or the tag data change.
+        """
+        key = (self.search_string, tuple(sorted(self._tag_versions.items())))
+        df, cached_key, search = self._search
+        if df is not self.df or cached_key != key or search.cancelled:
+            if self._searching():
+                search.cancel()
             try:
-                reff = self.df.iloc[self.pointer::-1]
+                search = filters.Search(self.df, self.search_string,
+                                        start=self.pointer,
+                                        backward=action == 'N',
+                                        indexes=self._ngrams)
+            except re.error as e:
+                self.error = f'Invalid pattern: {e}'
+                return
+            self._search = (self.df, key, search)
+        self._search_action = (action, self.pointer)
+        self._poll_search()
+
+    def _searching(self):
+        search = self._search[2]
+        return search is not None and not search.done and \
+            not search.cancelled
+
+    def _cancel_search(self):
+        """ Stops the search that an action is waiting for. """
+        if self._search_action is not None and self._searching():
+            self._search[2].cancel()
+            self.error = 'Search cancelled.'
+        self._search_action = None
+
+    def _poll_search(self):
+        """ Runs the pending search action once its result is known. """
+        df, _, search = self._search
+        if df is not self.df:
+            if self._searching():
+                search.cancel()
+            self._search_action = None
+            return
+        if self._search_action is None:
+            return
+        if search.error is not None:
+            logging.error('The search failed with: %s', search.error)
+            self.error = f'Search failed: {search.error}'
+            self._search_action = None
+            return
+        action, pointer = self._search_action
+        hits, searched = search.result()
+        if action == 'n':
+            i = np.searchsorted(hits, pointer, side='right')
+            if i < len(hits) and searched[pointer + 1:hits[i]].all():
+                self.pointer = int(hits[i])
+                self.selection = {self.pointer}
+            elif i == len(hits) and searched[pointer + 1:].all():
+                self.error = 'No match found below.'
+            else:
+                return
+        elif action == 'N':
+            i = np.searchsorted(hits, pointer, side='left') - 1
+            if i >= 0 and searched[hits[i] + 1:pointer].all():
+                self.pointer = int(hits[i])
+                self.selection = {self.pointer}
+            elif i < 0 and searched[:pointer].all():
                 self.error = 'No match found above.'
-                for index, (ind, line) in enumerate(reff.iterrows()):
-                    h = line.astype(str).str.contains(self.search_string).any()
-                    if not h or index == 0:
-                        continue
-                    self.error = ''
-                    self.pointer -= index
-                    self.selection = {self.pointer}
-                    break
-            except KeyboardInterrupt:
-                logging.debug('Aborting the search.')
+            else:
+                return
+        else:
+            if not search.done:
+                return
+            if len(hits) == 0:
+                self.error = 'No match found.'
+            else:
+                self.selection.update(hits.tolist())
+                self.pointer = int(hits[-1])
+        self._search_action = None
 
     def make_str(self, tag):
         hight = min(23, curses.LINES - 4)
@@ -965,11 +1823,15 @@ class App:
                     if col not in value:
                         value.append(col)
             setattr(self, key, value)
-        self.total_lines = self.df.shape[0]
+        if self.df is not None:
+            self.total_lines = self.df.shape[0]
 
     @property
     def cache(self):
-        return {'_view_state': self._view_state, 'version': self.__version__}
+        view_state = self._view_state
+        # the data frame is rebuilt after the start
+        del view_state['df']
+        return {'_view_state': view_state, 'version': self.__version__}
 
     @cache.setter
     def cache(self, cache):
@@ -979,58 +1841,204 @@ class App:
     def data(self):
         return {
             'tag definitions': self.tags,
-            'tags': self.tag_data
+            'tags': self.tag_data.to_dict()
         }
 
     @data.setter
     def data(self, data):
-        self.tag_data = data.get('tags', dict())
+        self.tag_data = tagstore.TagStore(self.raw_df.index,
+                                          data.get('tags') or dict())
         self.tags.update(data.get('tag definitions', dict()))
         for tag in self.tags:
-            self.tag_data.setdefault(tag, dict())
+            self.tag_data.add(tag)
+        self._touch_tags(*self.tag_data)
 
     def get_current_values(self, tag):
         selection = list(self.selection)
         ids = self._id_for_index(selection)
-        td = self.tag_data[tag]
-        return {td[id] for id in ids if id in td}
+        return self._tag_values(tag).values_of(ids)
+
+    def _tag_values(self, tag):
+        """ Returns the ``TagColumn`` of ``tag`` aligned with the table. """
+        self.tag_data.align(self.raw_df.index)
+        return self.tag_data[tag]
+
+    def _accession_rows(self, key):
+        """ Returns the sorted positions in the view of the sample with the
+        index ``key``, of the samples with the id ``key`` or of the series
+        ``key``. """
+        _, extra, index, version = self._stages['merge'][1]
+        if self._accessions[0] != version:
+            # tagged samples that are not in the table only have their key
+            parts = [str(key).split('_', 1) + [''] for key in extra]
+            gse = np.concatenate([self.raw_df['gse'].to_numpy(dtype=object),
+                                  np.array([p[0] for p in parts],
+                                           dtype=object)])
+            ids = np.concatenate([self.raw_df['id'].to_numpy(dtype=object),
+                                  np.array([p[1] for p in parts],
+                                           dtype=object)])
+            self._accessions = (version,
+                                positions.Accessions(index, gse, ids))
+        view, inverse = self._view_rows
+        if view is not self.df:
+            project = self._stages.get('project')
+            if project is not None and project[1] is self.df:
+                rows = np.asarray(self._stages['sort'][1])
+            else:
+                rows = index.get_indexer(self.df.index)
+            inverse = np.full(len(index), -1, dtype=np.int64)
+            inside = rows >= 0
+            inverse[rows[inside]] = np.flatnonzero(inside)
+            self._view_rows = (self.df, inverse)
+        found = inverse[self._accessions[1].rows(key)]
+        return np.sort(found[found >= 0])
+
+    def _go_to(self, val, add=False):
+        """ Moves the pointer to the position or the sample ``val`` or to
+        the first sample of the series ``val``. With ``add`` the rows are
+        added to the selection, all samples of a series. """
+        if val.isnumeric():
+            self.pointer = min(self.total_lines - 1, max(0, int(float(val))))
+            rows = [self.pointer]
+        else:
+            rows = self._accession_rows(val)
+            if len(rows) == 0 and val.upper() != val:
+                rows = self._accession_rows(val.upper())
+            if len(rows) == 0:
+                self.error = f'{val} is no position or accession in the view.'
+                return
+            self.pointer = int(rows[0])
+        if add:
+            self.selection.update(int(row) for row in rows)
+        else:
+            self.selection = {self.pointer}
+
+    def _positions(self, tag):
+        """ Returns the ``positions.ValuePositions`` of the column ``tag`` of
+        the view. """
+        view, by_tag = self._value_positions
+        if view is not self.df:
+            by_tag = dict()
+            self._value_positions = (self.df, by_tag)
+        if tag not in by_tag:
+            by_tag[tag] = positions.ValuePositions()
+        return by_tag[tag]
+
+    def _jump(self, value, step, start=None):
+        """ Returns the position of the next row from ``start`` on in the
+        direction ``step`` whose current tag is ``value`` or None.
+
+        With ``value`` None it is the next row after ``start`` whose current
+        tag differs from that of ``start``. ``start`` defaults to the pointer.
+        """
+        if self.current_tag not in self.df.columns:
+            self.error = f'The tag {self.current_tag} is not shown.'
+            return None
+        if start is None:
+            start = self.pointer
+        column = self.df[self.current_tag]
+        index = self._positions(self.current_tag)
+        if value is None:
+            return index.next_other(column.iloc[start], column, start + step,
+                                    step)
+        return index.next(value, column, start, step)
+
+    def _jump_to_value(self, step):
+        """ Moves the pointer to the next row in the direction ``step``
+        whose current tag is the ``jump_value``. """
+        if not self.jump_value:
+            self.error = 'Press = to enter the tag info to jump to.'
+            return False
+        if self.current_tag not in self.df.columns:
+            self.error = f'The tag {self.current_tag} is not shown.'
+            return False
+        column = self.df[self.current_tag]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            values = [value for value in column.cat.categories
+                      if str(value) == self.jump_value]
+        else:
+            values = [self.jump_value]
+            if self.jump_value.lstrip('-').isdigit():
+                values.append(int(self.jump_value))
+        rows = [self._jump(value, step, self.pointer + step)
+                for value in values]
+        rows = [row for row in rows if row is not None]
+        if not rows:
+            self.error = f'No entries with {self.current_tag} ' \
+                f'{self.jump_value} ' + ('below.' if step > 0 else 'above.')
+            return False
+        self.pointer = min(rows) if step > 0 else max(rows)
+        self.selection = {self.pointer}
+        return True
+
+    def _own_view(self):
+        """ Replaces the view by a copy if it is the cached result of the
+        project stage, so it can be changed in place. The caches of the view
+        are kept for the copy. """
+        project = self._stages.get('project')
+        if project is None or project[1] is not self.df:
+            return
+        view, self.df = self.df, self.df.copy(deep=False)
+        for name in ('_colors', '_value_positions', '_view_rows'):
+            cached = getattr(self, name)
+            if cached[0] is view:
+                setattr(self, name, (self.df,) + cached[1:])
+
+    def _set_view_values(self, tag, rows, values):
+        """ Writes ``values`` to the ``rows`` of the column ``tag`` of the
+        view. """
+        self._own_view()
+        column = self.df[tag]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            distinct = pd.unique(np.atleast_1d(np.asarray(values,
+                                                          dtype=object)))
+            new = pd.Index(distinct, dtype=object).difference(
+                column.cat.categories)
+            if len(new):
+                self.df[tag] = column.cat.add_categories(new)
+        self.df.iloc[rows, self.df.columns.get_loc(tag)] = values
+        view, by_tag = self._value_positions
+        if tag in by_tag and view is self.df:
+            by_tag[tag].update(rows, values)
+        df, colmap, colors = self._colors
+        if tag == self.coloring_now and df is self.df and \
+                colmap is self.colmap:
+            colors[rows] = self._color_pairs(self.df[tag].iloc[rows], colmap)
 
     @undoable
     def del_tag_data(self, tag):
         view_state = self._view_state
         lselected = list(self.selection)
         ids = self._id_for_index(lselected)
-        td = self.tag_data[tag]
-        current = {id: td.get(id) for id in ids}
+        td = self._tag_values(tag)
+        current = td.snapshot(ids)
         if len(ids) == 1:
             id = next(iter(ids))
             long_desc = f'removing tag data "{tag}" for {id}'
             short_desc = f'delete {tag} for {id}'
         else:
-            lids = list(ids)
+            lids = ids.tolist()
             long_desc = f'removing tag data "{tag}" for {lids}'
             short_desc = f'delete {tag} for [{lids[0]}, ...]'
         logging.info(long_desc)
-        for id in ids:
-            td.pop(id, None)
+        td.remove(ids)
+        self._touch_tags(tag, ids=ids)
         df_data = False
         if tag in self.df.columns:
             df_data = True
-            old_df = self.df.loc[self.df.index[lselected], tag]
-            self.df.loc[self.df.index[lselected], tag] = self.missing_data_value
+            old_df = np.asarray(self.df[tag].iloc[lselected], dtype=object)
+            self._set_view_values(tag, lselected, self.missing_data_value)
         self.save_tag_data()
-        self.stale_lines.update(self.selection)
+        self.lines.discard(self.selection)
         yield short_desc
         logging.info('undoing %s', long_desc)
-        for id, v in current.items():
-            if v is None or v is np.nan:
-                td.pop(id, None)
-            else:
-                td[id] = v
+        td = self._tag_values(tag)
+        td.restore(current)
+        self._touch_tags(tag, ids=ids)
         self.save_tag_data()
         self._view_state = view_state
         if df_data:
-            self.df.loc[self.df.index[lselected], tag] = old_df
+            self._set_view_values(tag, lselected, old_df)
         self._reset_lines()
 
     @undoable
@@ -1038,8 +2046,8 @@ class App:
         self._view_state = view_state
         lselected = list(self.selection)
         ids = self._id_for_index(lselected)
-        td = self.tag_data[tag]
-        current = {id: td.get(id) for id in ids}
+        td = self._tag_values(tag)
+        current = td.snapshot(ids)
         if self.tags[tag]['type'] == 'str':
             log_val = val.splitlines()[0]
             if len(log_val) > 20:
@@ -1051,30 +2059,28 @@ class App:
             long_desc = f'setting tag "{tag}" to "{log_val}" for {id}'
             short_desc = f'{tag}={log_val} for {id}'
         else:
-            lids = list(ids)
+            lids = ids.tolist()
             long_desc = f'setting tag "{tag}" to "{log_val}" for {lids}'
             short_desc = f'{tag}={log_val} for [{lids[0]}, ...]'
         logging.info(long_desc)
-        for id in ids:
-            td[id] = val
+        td.assign(ids, val)
+        self._touch_tags(tag, ids=ids)
         df_data = False
         if tag in self.df.columns:
             df_data = True
-            old_df = self.df.loc[self.df.index[lselected], tag]
-            self.df.loc[self.df.index[lselected], tag] = val
+            old_df = np.asarray(self.df[tag].iloc[lselected], dtype=object)
+            self._set_view_values(tag, lselected, val)
         self.save_tag_data()
-        self.stale_lines.update(self.selection)
+        self.lines.discard(self.selection)
         yield short_desc
         logging.info('undoing %s', long_desc)
-        for id, v in current.items():
-            if v is None or v is np.nan:
-                td.pop(id, None)
-            else:
-                td[id] = v
+        td = self._tag_values(tag)
+        td.restore(current)
+        self._touch_tags(tag, ids=ids)
         self.save_tag_data()
         self._view_state = view_state
         if df_data:
-            self.df.loc[self.df.index[lselected], tag] = old_df
+            self._set_view_values(tag, lselected, old_df)
         self._reset_lines()
 
     def save_tag_data(self, asynchronous=True):
@@ -1137,8 +2143,7 @@ class App:
         hight = min(len(help) + 1, curses.LINES - 4)
         text_width = max(len(line) for line in help)
         width = min(text_width + 8, curses.COLS - 4)
-        self.win = self.stdscr.subwin(hight, width, 2, 2)
-        self.win.clear()
+        self.win = self._screen.window(self.stdscr, hight, width, 2, 2)
         self.win.border()
         for i in range(1, hight - 1):
             self.win.addstr(i, 5, help[i][:width - 6])
@@ -1152,8 +2157,7 @@ class App:
         hight = min(len(self.ordered_columns) +
                     self.table_y0 + 2, curses.LINES - 4)
         width = min(self._window_width, curses.COLS - 4)
-        self.win = self.stdscr.subwin(hight, width, 2, 2)
-        self.win.clear()
+        self.win = self._screen.window(self.stdscr, hight, width, 2, 2)
         self.win.border()
         buttons = {
             'v': 'exit',
@@ -1350,8 +2354,7 @@ class App:
         else:
             self.woffset = obove_selected_hight + selection_hight - table_capacity - 1
         self.woffset = max(0, self.woffset)
-        self.win = self.stdscr.subwin(hight, width, 2, 2)
-        self.win.clear()
+        self.win = self._screen.window(self.stdscr, hight, width, 2, 2)
         self.win.border()
         buttons = {
             't': 'exit',
@@ -1526,6 +2529,8 @@ class App:
         used_keyes = {t['key'] for t in self.tags.values()}
         current_key = info.get('key', '')
         used_keyes -= {current_key}
+        # the main loop polls the window while the table is loading
+        self.stdscr.timeout(-1)
         while True:
             self.stdscr.addstr(ypos, xpos, current_key)
             self.stdscr.refresh()
@@ -1579,9 +2584,11 @@ class App:
         old_info = self.tags.get(tag_name)
         self.tags[tag_name] = new_info
         if old_info is None:
-            self.tag_data.setdefault(tag_name, dict())
+            self.tag_data.add(tag_name)
+            self._touch_tags(tag_name)
             self.ordered_columns = [tag_name] + self.ordered_columns
             self.show_columns.add(tag_name)
+            self._own_view()
             self.df.insert(0, tag_name, self.missing_data_value)
             desc = f'create tag {tag_name}.'
         else:
@@ -1600,6 +2607,8 @@ class App:
             self.show_columns.remove(tag_name)
             del self.tags[tag_name]
             del self.tag_data[tag_name]
+            self._touch_tags(tag_name)
+            self._own_view()
             del self.df[tag_name]
         else:
             self.tags[tag_name] = old_info
@@ -1617,11 +2626,13 @@ class App:
         old_data = self.tag_data[tag_name]
         del self.tags[tag_name]
         del self.tag_data[tag_name]
+        self._touch_tags(tag_name)
         self.show_columns -= {tag_name}
         self.ordered_columns.remove(tag_name)
         df_dat = None
         if tag_name in self.df:
             df_dat = self.df[tag_name]
+            self._own_view()
             del self.df[tag_name]
             self._reset_lines()
         desc = f'remove tag {tag_name}'
@@ -1632,8 +2643,10 @@ class App:
         logging.info('undoing %s', desc)
         self.tags[tag_name] = old_def
         self.tag_data[tag_name] = old_data
+        self._touch_tags(tag_name)
         self.ordered_columns = [tag_name] + self.ordered_columns
         self.show_columns.add(tag_name)
+        self._own_view()
         self.df.insert(0, tag_name, self.missing_data_value)
         if df_dat is not None:
             self.df[tag_name] = df_dat
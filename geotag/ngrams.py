@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2019 Gesellschaft zur Foerderung der angewandten Forschung e.V.
+# acting on behalf of its Fraunhofer Institute for Cell Therapy and Immunology
+# (IZI).
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with
+# this program. If not, see http://www.gnu.org/licenses/.
+
+"""Trigram index of the distinct strings of a column.
+
+The index maps each trigram to the sorted ids of the strings that contain
+it. Every match of a regular expression contains the literal text of the
+expression outside of alternatives and optional parts, so only the strings
+with all trigrams of that text need to be tested with the expression.
+
+The index keeps the strings it was built from. Strings of a column that are
+not in the index are always tested, so an index that is older than the
+table is still correct and only narrows the search down less.
+"""
+
+import os
+import re
+import hashlib
+import zipfile
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+try:
+    from re import _parser as _sre
+except ImportError:  # Python < 3.11
+    import sre_parse as _sre
+
+MIN_LITERAL = 3
+_MAPPINGS = 4
+
+
+def _runs(parsed, runs):
+    """ Adds the literal runs every match of ``parsed`` contains to ``runs``.
+    """
+    run = list()
+    for op, av in parsed:
+        if op is _sre.LITERAL:
+            run.append(chr(av))
+            continue
+        runs.append(''.join(run))
+        run = list()
+        if op is _sre.SUBPATTERN and not av[1] and not av[2]:
+            _runs(av[3], runs)
+        elif op in (_sre.MAX_REPEAT, _sre.MIN_REPEAT) and av[0] >= 1:
+            _runs(av[2], runs)
+    runs.append(''.join(run))
+
+
+def literals(pattern):
+    """ Returns the literal strings of at least ``MIN_LITERAL`` characters
+    that every match of the regular expression ``pattern`` contains. """
+    try:
+        parsed = _sre.parse(pattern)
+    except (re.error, RecursionError):
+        return []
+    state = getattr(parsed, 'state', None) or getattr(parsed, 'pattern')
+    if state.flags & re.IGNORECASE:
+        return []
+    runs = list()
+    _runs(parsed, runs)
+    return [run for run in runs if len(run) >= MIN_LITERAL]
+
+
+def _code_points(strings):
+    """ Returns the code points of the concatenated ``strings`` and the
+    length of each. """
+    lengths = np.fromiter(map(len, strings), dtype=np.int64,
+                          count=len(strings))
+    text = ''.join(strings).encode('utf-32-le', 'surrogatepass')
+    return np.frombuffer(text, dtype=np.uint32), lengths
+
+
+def _trigrams(points, lengths, first_id=0):
+    """ Returns the trigrams of the strings and the ids of the strings that
+    contain them, sorted and without repetitions. """
+    owner = np.repeat(np.arange(first_id, first_id + len(lengths),
+                                dtype=np.int32), lengths)
+    if len(points) < 3:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int32)
+    points = points.astype(np.uint64)
+    grams = (points[:-2] << np.uint64(42)) | (points[1:-1] << np.uint64(21)) \
+        | points[2:]
+    inside = owner[:-2] == owner[2:]
+    grams, owner = grams[inside], owner[:-2][inside]
+    order = np.lexsort((owner, grams))
+    grams, owner = grams[order], owner[order]
+    new = np.ones(len(grams), dtype=bool)
+    new[1:] = (grams[1:] != grams[:-1]) | (owner[1:] != owner[:-1])
+    return grams[new], owner[new]
+
+
+def path(directory, col):
+    """ Returns the file of the index of ``col`` in ``directory``. """
+    name = hashlib.sha1(str(col).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(directory, name + '.npz')
+
+
+class TrigramIndex:
+    """ The strings of a column and the ids of the strings per trigram.
+
+    ``extend`` swaps in all arrays of the index at once, so a search on
+    another thread sees either the old or the new index.
+    """
+
+    def __init__(self, strings=()):
+        self._lock = threading.Lock()
+        self._mappings = OrderedDict()
+        # the strings, their lookup, their code points and lengths, the
+        # sorted trigrams and where their ids start in the ids
+        self._state = (np.empty(0, dtype=object), pd.Index([], dtype=object),
+                       np.empty(0, dtype=np.uint32),
+                       np.empty(0, dtype=np.int64),
+                       np.empty(0, dtype=np.uint64),
+                       np.zeros(1, dtype=np.int64),
+                       np.empty(0, dtype=np.int32))
+        self.extend(strings)
+
+    @property
+    def strings(self):
+        return self._state[0]
+
+    def __len__(self):
+        return len(self.strings)
+
+    def extend(self, strings):
+        """ Adds the ``strings`` that are not indexed yet and returns how
+        many were added. """
+        old_strings, lookup, old_points, old_lengths, keys, offsets, \
+            old_ids = self._state
+        strings = pd.unique(np.asarray(strings, dtype=object))
+        new = strings[lookup.get_indexer(pd.Index(strings, dtype=object)) < 0]
+        if len(new) == 0:
+            return 0
+        points, lengths = _code_points(new.tolist())
+        grams, ids = _trigrams(points, lengths, len(old_strings))
+        if len(old_ids):
+            old = np.repeat(keys, np.diff(offsets))
+            grams = np.concatenate([old, grams])
+            ids = np.concatenate([old_ids, ids])
+            order = np.lexsort((ids, grams))
+            grams, ids = grams[order], ids[order]
+        keys, starts = np.unique(grams, return_index=True)
+        strings = np.concatenate([old_strings, new])
+        self._state = (strings, pd.Index(strings, dtype=object),
+                       np.concatenate([old_points, points]),
+                       np.concatenate([old_lengths, lengths]),
+                       keys, np.append(starts, len(grams)).astype(np.int64),
+                       ids)
+        return len(new)
+
+    @staticmethod
+    def _candidates(state, runs):
+        """ Returns the sorted ids of the strings with all trigrams of the
+        literal ``runs``. """
+        keys, offsets, ids = state[4:]
+        points, lengths = _code_points(runs)
+        grams = np.unique(_trigrams(points, lengths)[0])
+        found = np.searchsorted(keys, grams)
+        found = np.minimum(found, len(keys) - 1)
+        if len(keys) == 0 or (keys[found] != grams).any():
+            return np.empty(0, dtype=np.int32)
+        postings = sorted((ids[offsets[i]:offsets[i + 1]] for i in found),
+                          key=len)
+        candidates = postings[0]
+        for other in postings[1:]:
+            candidates = np.intersect1d(candidates, other, assume_unique=True)
+        return candidates
+
+    def _mapping(self, state, strings, key):
+        """ Returns the id of each of the ``strings`` in the index or -1.
+
+        The ids are kept for the most recent ``key`` objects, so ``key``
+        must be an object that is not changed, e.g., the ``strings``.
+        """
+        lookup = state[1]
+        with self._lock:
+            entry = self._mappings.get(id(key))
+            if entry is not None and entry[0] is key and \
+                    entry[1] is lookup:
+                self._mappings.move_to_end(id(key))
+                return entry[2]
+        indexer = lookup.get_indexer(pd.Index(strings, dtype=object))
+        with self._lock:
+            self._mappings[id(key)] = (key, lookup, indexer)
+            if len(self._mappings) > _MAPPINGS:
+                self._mappings.popitem(last=False)
+        return indexer
+
+    def narrow(self, strings, pattern, key=None):
+        """ Returns the sorted positions of the ``strings`` that may contain
+        ``pattern`` or None if the index does not narrow them down. """
+        state = self._state
+        runs = literals(pattern)
+        if not runs or len(state[0]) == 0:
+            return None
+        indexer = self._mapping(state, strings,
+                                strings if key is None else key)
+        ids = self._candidates(state, runs)
+        return np.flatnonzero((indexer < 0) | np.isin(indexer, ids))
+
+    def save(self, file):
+        """ Writes the index to ``file``. """
+        _, _, points, lengths, keys, offsets, ids = self._state
+        os.makedirs(os.path.dirname(os.path.abspath(file)), exist_ok=True)
+        tmp_name = f'{file}.tmp{os.getpid()}.npz'
+        np.savez(tmp_name, points=points, lengths=lengths, keys=keys,
+                 offsets=offsets, ids=ids)
+        os.replace(tmp_name, file)
+
+    @classmethod
+    def load(cls, file):
+        """ Returns the index in ``file`` or None if it cannot be read. """
+        try:
+            with np.load(file) as data:
+                arrays = {name: data[name] for name in data.files}
+            text = arrays['points'].tobytes().decode('utf-32-le',
+                                                     'surrogatepass')
+        except (OSError, EOFError, ValueError, KeyError, UnicodeDecodeError,
+                zipfile.BadZipFile):
+            return None
+        index = cls()
+        ends = np.cumsum(arrays['lengths']).tolist()
+        strings = np.empty(len(ends), dtype=object)
+        strings[:] = [text[a:b] for a, b in zip([0] + ends[:-1], ends)]
+        index._state = (strings, pd.Index(strings, dtype=object),
+                        arrays['points'], arrays['lengths'], arrays['keys'],
+                        arrays['offsets'], arrays['ids'])
+        return index
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2019 Gesellschaft zur Foerderung der angewandten Forschung e.V.
+# acting on behalf of its Fraunhofer Institute for Cell Therapy and Immunology
+# (IZI).
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with
+# this program. If not, see http://www.gnu.org/licenses/.
+
+"""Positions of the rows of the view to jump to.
+
+The sorted positions of the rows with a value of a column are found once
+and then kept up to date as values are set, so jumps to the next row with
+or without a value are answered by binary search. The rows of each series
+and sample are grouped once per table and looked up by hash.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _run_end(positions, i, step):
+    """ Returns the index of the last of the consecutive ``positions`` from
+    ``i`` on in the direction ``step``.
+
+    ``positions[j] - j`` never decreases, so a run of consecutive positions
+    is where it stays the same.
+    """
+    offset = positions[i] - i
+    if step > 0:
+        low, high = i, len(positions) - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if positions[middle] - middle == offset:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+    low, high = 0, i
+    while low < high:
+        middle = (low + high) // 2
+        if positions[middle] - middle == offset:
+            high = middle
+        else:
+            low = middle + 1
+    return low
+
+
+def _find(positions, rows):
+    """ Returns the indices of the ``rows`` that are in ``positions``. """
+    at = np.searchsorted(positions, rows)
+    inside = at < len(positions)
+    at, rows = at[inside], rows[inside]
+    return at[positions[at] == rows]
+
+
+class ValuePositions:
+    """ The sorted positions of the rows of a column with each value.
+
+    The positions of a value are found when they are first needed and are
+    then kept up to date with ``update``.
+    """
+
+    def __init__(self):
+        self._positions = dict()
+
+    def positions(self, value, column):
+        """ Returns the sorted positions of the rows of ``column`` with
+        ``value``. """
+        positions = self._positions.get(value)
+        if positions is None:
+            positions = np.flatnonzero(np.asarray(column == value,
+                                                  dtype=bool))
+            self._positions[value] = positions
+        return positions
+
+    def update(self, rows, values):
+        """ Records that the ``rows`` were set to ``values``, which is one
+        value or one per row. """
+        rows = np.asarray(rows, dtype=np.int64)
+        new_values = np.empty(len(rows), dtype=object)
+        new_values[:] = values
+        for value, positions in self._positions.items():
+            has = np.asarray(new_values == value, dtype=bool)
+            positions = np.delete(positions, _find(positions, rows[~has]))
+            added = np.setdiff1d(rows[has], positions[_find(positions,
+                                                           rows[has])])
+            self._positions[value] = np.insert(
+                positions, np.searchsorted(positions, added), added)
+
+    def next(self, value, column, start, step=1):
+        """ Returns the position of the first row from ``start`` on in the
+        direction ``step`` with ``value`` or None. """
+        positions = self.positions(value, column)
+        if step > 0:
+            i = np.searchsorted(positions, start, side='left')
+            return int(positions[i]) if i < len(positions) else None
+        i = np.searchsorted(positions, start, side='right') - 1
+        return int(positions[i]) if i >= 0 else None
+
+    def next_other(self, value, column, start, step=1):
+        """ Returns the position of the first row from ``start`` on in the
+        direction ``step`` without ``value`` or None. """
+        if start < 0 or start >= len(column):
+            return None
+        positions = self.positions(value, column)
+        i = np.searchsorted(positions, start)
+        if i == len(positions) or positions[i] != start:
+            return start
+        other = int(positions[_run_end(positions, i, step)]) + step
+        return other if 0 <= other < len(column) else None
+
+
+def _groups(values):
+    """ Returns the distinct ``values``, the rows ordered by value and
+    where the rows of each distinct value start in that order. """
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    order = np.argsort(codes, kind='stable')
+    starts = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    return pd.Index(uniques, dtype=object), order, starts
+
+
+class Accessions:
+    """ The rows of the samples by index key, series and sample id. """
+
+    def __init__(self, index, gse, ids):
+        self._index = pd.Index(index, dtype=object)
+        self._groups = [_groups(gse), _groups(ids)]
+
+    def rows(self, key):
+        """ Returns the sorted rows of the sample with the index ``key``, of
+        the samples with the id ``key`` or of the series ``key``. """
+        row = self._index.get_indexer([key])[0]
+        if row >= 0:
+            return np.array([row])
+        for uniques, order, starts in self._groups:
+            code = uniques.get_indexer([key])[0]
+            if code >= 0:
+                return order[starts[code]:starts[code + 1]]
+        return np.empty(0, dtype=np.int64)
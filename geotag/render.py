@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2019 Gesellschaft zur Foerderung der angewandten Forschung e.V.
+# acting on behalf of its Fraunhofer Institute for Cell Therapy and Immunology
+# (IZI).
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with
+# this program. If not, see http://www.gnu.org/licenses/.
+
+"""A model of the drawn screen to only draw the rows that changed.
+
+Everything drawn through a ``Screen`` is remembered per row. A row is only
+written to the curses window again if its text or attributes differ from
+the last frame. Anything drawn around the model, e.g., by a prompt, must be
+followed by ``invalidate``.
+"""
+
+import curses
+
+
+class Screen:
+    """ The text and attributes last drawn to each row of a window. """
+
+    def __init__(self):
+        self._rows = dict()
+        self._windows = dict()
+        self.size = None
+
+    def invalidate(self):
+        """ Forgets what was drawn, so every row is drawn again. """
+        self._rows = dict()
+
+    def resize(self, lines, cols):
+        """ Invalidates the model if the terminal size changed. """
+        if self.size != (lines, cols):
+            self.size = (lines, cols)
+            self._windows = dict()
+            self.invalidate()
+
+    def draw(self, window, y, x, text, attr=curses.A_NORMAL):
+        """ Draws ``text`` at ``y``, ``x`` unless it is already there. """
+        key = (x, text, attr)
+        if self._rows.get(y) == key:
+            return False
+        window.addstr(y, x, text, attr)
+        self._rows[y] = key
+        return True
+
+    def draw_segments(self, window, y, segments):
+        """ Draws the ``segments`` of text and attributes one after the other
+        from the start of row ``y`` unless they are already there. """
+        key = ('segments', tuple(segments))
+        if self._rows.get(('segments', y)) == key:
+            return False
+        window.move(y, 0)
+        for text, attr in segments:
+            window.addstr(text, attr)
+        self._rows[('segments', y)] = key
+        return True
+
+    def window(self, parent, hight, width, y, x):
+        """ Returns an erased sub-window of ``parent`` that is reused while
+        the geometry stays the same. """
+        key = (id(parent), hight, width, y, x)
+        win = self._windows.get(key)
+        if win is None:
+            win = self._windows[key] = parent.subwin(hight, width, y, x)
+        win.erase()
+        return win
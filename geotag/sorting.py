@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2019 Gesellschaft zur Foerderung der angewandten Forschung e.V.
+# acting on behalf of its Fraunhofer Institute for Cell Therapy and Immunology
+# (IZI).
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with
+# this program. If not, see http://www.gnu.org/licenses/.
+
+"""Sort keys and cached row permutations of the view.
+
+Text sorts numeric-aware, so accessions like GSE200 come before GSE1000.
+Numbers sort before text in mixed columns and missing values come last in
+either direction.
+"""
+
+import re
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+_DIGITS = re.compile(r'(\d+)')
+
+
+def natural_key(text):
+    """ Returns a key of ``text`` that compares the runs of digits as
+    numbers. """
+    parts = _DIGITS.split(text)
+    parts[1::2] = [int(part) for part in parts[1::2]]
+    return tuple(parts)
+
+
+def _value_key(value):
+    if isinstance(value, (int, float, np.number)) and \
+            not isinstance(value, bool):
+        return 0, float(value)
+    return 1, natural_key(str(value))
+
+
+def sort_key(values, ascending=True, missing=None):
+    """ Returns an integer array that sorts like ``values``.
+
+    Missing values and those equal to ``missing`` get the largest key.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.values
+        uniques = values.cat.categories
+    else:
+        codes, uniques = pd.factorize(values)
+    if pd.api.types.is_numeric_dtype(uniques.dtype) and \
+            not pd.api.types.is_bool_dtype(uniques.dtype):
+        order = np.argsort(np.asarray(uniques), kind='stable')
+    else:
+        present = np.arange(len(uniques))
+        if missing is not None:
+            is_missing = pd.Index(uniques, dtype=object) == missing
+            present = present[~np.asarray(is_missing, dtype=bool)]
+        order = sorted(present, key=lambda i: _value_key(uniques[i]))
+    ranks = np.full(len(uniques) + 1, len(uniques), dtype=np.int64)
+    positions = np.arange(len(order))
+    ranks[np.asarray(order, dtype=np.int64)] = \
+        positions if ascending else positions[::-1]
+    # missing values have the code -1
+    return ranks[codes]
+
+
+class SortCache:
+    """ Row permutations for recently used sort orders.
+
+    A sort order is a tuple of ``(column, ascending)``. If only a few rows
+    of a column changed since a permutation was made, these rows are
+    removed and inserted again instead of sorting all rows.
+    """
+
+    def __init__(self, missing=None, size=8, max_changed=.01):
+        self.missing = missing
+        self.size = size
+        self.max_changed = max_changed
+        self._keys = dict()
+        self._permutations = OrderedDict()
+
+    def clear(self):
+        self._keys = dict()
+        self._permutations = OrderedDict()
+
+    def tokens(self, col):
+        """ Returns the tokens of ``col`` the cached permutations were made
+        with. """
+        return [token for order, (tokens, _) in self._permutations.items()
+                for (c, _), token in zip(order, tokens) if c == col]
+
+    def _key(self, col, ascending, token, values):
+        cached = self._keys.get((col, ascending))
+        if cached is None or cached[0] != token:
+            key = sort_key(values(col), ascending, self.missing)
+            cached = self._keys[(col, ascending)] = (token, key)
+        return cached[1]
+
+    def permutation(self, order, tokens, values, changed):
+        """ Returns the rows sorted by ``order``.
+
+        ``tokens`` changes with the values of each column of ``order``,
+        ``values(col)`` returns a column and ``changed(col, old, new)``
+        returns the rows that changed between two tokens or ``None`` if
+        that is unknown.
+        """
+        keys = list()
+        for (col, ascending), token in zip(order, tokens):
+            keys.append(self._key(col, ascending, token, values))
+        cached = self._permutations.pop(order, None)
+        permutation = None
+        if cached is not None and cached[0] == tokens:
+            permutation = cached[1]
+        elif cached is not None:
+            rows = self._changed_rows(order, cached[0], tokens, changed)
+            if rows is not None and \
+                    len(rows) <= self.max_changed * len(cached[1]):
+                permutation = _reinsert(cached[1], rows, keys)
+        if permutation is None:
+            permutation = np.lexsort(keys[::-1])
+        self._permutations[order] = (tokens, permutation)
+        if len(self._permutations) > self.size:
+            self._permutations.popitem(last=False)
+        return permutation
+
+    def _changed_rows(self, order, old_tokens, tokens, changed):
+        rows = list()
+        for (col, _), old, new in zip(order, old_tokens, tokens):
+            if old == new:
+                continue
+            col_rows = changed(col, old, new)
+            if col_rows is None:
+                return None
+            rows.append(col_rows)
+        return np.unique(np.concatenate(rows))
+
+
+def _row_key(keys, row):
+    return tuple(int(key[row]) for key in keys) + (int(row),)
+
+
+def _place(rest, keys, row):
+    """ Returns where ``row`` belongs in the sorted rows ``rest``. """
+    target = _row_key(keys, row)
+    low, high = 0, len(rest)
+    while low < high:
+        middle = (low + high) // 2
+        if _row_key(keys, rest[middle]) < target:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def _reinsert(permutation, rows, keys):
+    """ Moves the ``rows`` of the sorted ``permutation`` to the places given
+    by the new ``keys``. Ties are ordered by row like in a stable sort. """
+    if len(rows) == 0:
+        return permutation
+    rest = permutation[~np.isin(permutation, rows)]
+    rows = sorted(rows, key=lambda row: _row_key(keys, row))
+    places = [_place(rest, keys, row) for row in rows]
+    return np.insert(rest, places, rows)
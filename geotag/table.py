@@ -0,0 +1,702 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2019 Gesellschaft zur Foerderung der angewandten Forschung e.V.
+# acting on behalf of its Fraunhofer Institute for Cell Therapy and Immunology
+# (IZI).
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with
+# this program. If not, see http://www.gnu.org/licenses/.
+
+"""Reading of the sample tables and their binary snapshots.
+
+Tables are tab-separated files, optionally gzip, bz2, xz or zstd
+compressed, Parquet files or SQLite databases. The format is inferred
+from the file extension unless it is given.
+
+A snapshot is a directory with one ``.npy`` file per numeric column and
+dictionary encoded string columns (``.codes.npy`` plus the distinct values
+as a NUL separated utf-8 blob). The ``meta.json`` holds the key of the
+tables the snapshot was made from. Arrays are memory-mapped on read, so
+all sessions that use the same snapshot share the pages of the numeric
+columns and of the codes of categorical columns.
+"""
+
+import os
+import re
+import json
+import fcntl
+import shutil
+import hashlib
+import sqlite3
+import threading
+from contextlib import closing, contextmanager
+from urllib.parse import quote
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+SNAPSHOT_VERSION = 6
+TABLE_FORMATS = ['tsv', 'parquet', 'sqlite']
+_STRING_SEP = '\0'
+_TAIL_BYTES = 4096
+_WHERE_CHUNK_SIZE = 100000
+_WHERE_PATTERN = re.compile(r'^([^=~@]+)([=~@])(.*)$', re.DOTALL)
+_COMPRESSIONS = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz', '.zst': 'zstd'}
+_EXTENSIONS = {'.parquet': 'parquet', '.pq': 'parquet', '.sqlite': 'sqlite',
+               '.sqlite3': 'sqlite', '.db': 'sqlite'}
+_SQLITE_TABLE = 'samples'
+_held_locks = set()
+
+
+def signature(paths):
+    """ Returns path, size and mtime of each table to key snapshots. """
+    key = []
+    for path in paths:
+        stat = os.stat(path)
+        key.append([os.path.abspath(path), stat.st_size, stat.st_mtime_ns])
+    return key
+
+
+def parse_where(expressions):
+    """ Parses the row predicates given with ``--where``.
+
+    ``col=value`` keeps the rows with exactly that value, ``col~regex`` the
+    rows matching the regular expression and ``col@path`` the rows with one
+    of the values listed line-wise in the file. Returns json-able
+    ``[column, operator, value]`` triples with the operators "in" and "~".
+    """
+    where = list()
+    for expression in expressions or []:
+        match = _WHERE_PATTERN.match(expression)
+        if match is None:
+            raise ValueError(f'Cannot parse the predicate "{expression}". '
+                             'Use col=value, col~regex or col@path.')
+        col, op, value = match.groups()
+        if op == '=':
+            where.append([col, 'in', [value]])
+        elif op == '~':
+            re.compile(value)
+            where.append([col, '~', value])
+        else:
+            with open(value, 'r') as f:
+                values = sorted({line.strip() for line in f if line.strip()})
+            where.append([col, 'in', values])
+    return where
+
+
+def _as_text(values):
+    """ Returns the ``values`` as strings with integral floats written as
+    integers.
+
+    A chunk of an integer column is read as float if it has missing values,
+    so the predicates need to see the same text in either case.
+    """
+    if not pd.api.types.is_float_dtype(values.dtype):
+        return values.astype(str)
+    text = values.astype(str)
+    numbers = values.to_numpy()
+    with np.errstate(invalid='ignore'):
+        integral = (np.mod(numbers, 1) == 0) & (np.abs(numbers) < 2 ** 63)
+    text[integral] = values[integral].astype(np.int64).astype(str)
+    return text
+
+
+def where_mask(df, where):
+    """ Returns a boolean array of the rows of ``df`` that satisfy ``where``.
+
+    >>> chunks = [pd.DataFrame({'year': [2015, 2016]}),
+    ...           pd.DataFrame({'year': [2015, None]})]
+    >>> [where_mask(chunk, [['year', 'in', ['2015']]]).tolist()
+    ...  for chunk in chunks]
+    [[True, False], [True, False]]
+    """
+    mask = np.ones(len(df), dtype=bool)
+    for col, op, value in where:
+        if col not in df.columns:
+            raise KeyError(f'The table has no column "{col}" to filter by.')
+        values = _as_text(df[col])
+        if op == '~':
+            mask &= values.str.contains(value, regex=True, na=False).values
+        else:
+            mask &= values.isin(value).values
+    return mask
+
+
+def compression(path):
+    """ Returns the compression of a tab-separated table or ``None``. """
+    return _COMPRESSIONS.get(os.path.splitext(path)[1].lower())
+
+
+def table_format(path, fmt=None):
+    """ Returns ``fmt`` or the format inferred from the extension of the
+    table in ``path``. """
+    if fmt:
+        return fmt
+    root, ext = os.path.splitext(path.lower())
+    if ext in _COMPRESSIONS:
+        root, ext = os.path.splitext(root)
+    return _EXTENSIONS.get(ext, 'tsv')
+
+
+def _parquet():
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError('Reading Parquet tables requires pyarrow.') from None
+    return pq
+
+
+def _connect(path):
+    uri = 'file:' + quote(os.path.abspath(path)) + '?mode=ro'
+    return closing(sqlite3.connect(uri, uri=True))
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sqlite_table(con):
+    """ Returns the table named "samples" or the only table of the database.
+    """
+    names = [row[0] for row in con.execute(
+        "SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")]
+    if _SQLITE_TABLE in names:
+        return _SQLITE_TABLE
+    if len(names) == 1:
+        return names[0]
+    raise ValueError('The SQLite database needs a table named '
+                     f'"{_SQLITE_TABLE}" or only one table.')
+
+
+def _sqlite_columns(con, table):
+    cursor = con.execute(f'SELECT * FROM {_quote(table)} LIMIT 0')
+    return [d[0] for d in cursor.description]
+
+
+def _select(con, columns):
+    table = _sqlite_table(con)
+    if columns is None:
+        return f'SELECT * FROM {_quote(table)}'
+    header = _sqlite_columns(con, table)
+    names = ', '.join(_quote(col) for col in header if col in columns)
+    return f'SELECT {names} FROM {_quote(table)}'
+
+
+def _needed(columns, where=()):
+    if columns is None:
+        return None
+    return set(columns).union(col for col, _, _ in where)
+
+
+def _usecols(columns, where=()):
+    columns = _needed(columns, where)
+    if columns is None:
+        return None
+    return lambda col: col in columns
+
+
+def _projection(header, columns):
+    if columns is None:
+        return None
+    return [col for col in header if col in columns]
+
+
+def _no_columns(start, stop):
+    """ Returns a frame of the rows ``start`` to ``stop`` without columns.
+    """
+    return pd.DataFrame(index=pd.RangeIndex(start, stop))
+
+
+def _row_count(path, fmt):
+    """ Returns the number of rows of the table. """
+    if fmt == 'parquet':
+        return _parquet().ParquetFile(path).metadata.num_rows
+    if fmt == 'sqlite':
+        with _connect(path) as con:
+            table = _quote(_sqlite_table(con))
+            return con.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+    return len(pd.read_csv(path, sep="\t", low_memory=False, usecols=[0]))
+
+
+def _selects_nothing(path, columns, fmt):
+    """ Returns whether ``columns`` selects none of the columns of the
+    table, in which case only its rows are counted. """
+    return columns is not None and \
+        not _projection(table_columns(path, fmt), columns)
+
+
+def _filtered(df, columns, where):
+    if not where:
+        return df
+    df = df[where_mask(df, where)]
+    if columns is not None:
+        df = df[[col for col in df.columns if col in columns]]
+    return df
+
+
+def table_columns(path, fmt=None):
+    """ Returns the header of the table. """
+    fmt = table_format(path, fmt)
+    if fmt == 'parquet':
+        return list(_parquet().read_schema(path).names)
+    if fmt == 'sqlite':
+        with _connect(path) as con:
+            return _sqlite_columns(con, _sqlite_table(con))
+    return list(pd.read_csv(path, sep="\t", nrows=0).columns)
+
+
+def read_chunks(path, chunksize, columns=None, fmt=None):
+    """ Yields the chunks of the table with the columns in ``columns`` and
+    the approximate number of bytes of ``path`` read so far. """
+    fmt = table_format(path, fmt)
+    size = os.path.getsize(path)
+    if _selects_nothing(path, columns, fmt):
+        total = _row_count(path, fmt)
+        for start in range(0, total, chunksize):
+            stop = min(total, start + chunksize)
+            yield _no_columns(start, stop), size * stop // total
+    elif fmt == 'parquet':
+        table = _parquet().ParquetFile(path)
+        total = max(1, table.metadata.num_rows)
+        names = _projection(table.schema_arrow.names, columns)
+        rows = 0
+        for batch in table.iter_batches(batch_size=chunksize, columns=names):
+            rows += batch.num_rows
+            yield batch.to_pandas(), size * rows // total
+    elif fmt == 'sqlite':
+        with _connect(path) as con:
+            table = _quote(_sqlite_table(con))
+            total = max(1, con.execute(f'SELECT COUNT(*) FROM {table}')
+                        .fetchone()[0])
+            rows = 0
+            for chunk in pd.read_sql_query(_select(con, columns), con,
+                                           chunksize=chunksize):
+                rows += len(chunk)
+                yield chunk, size * rows // total
+    else:
+        with open(path, 'rb') as f:
+            reader = pd.read_csv(f, sep="\t", low_memory=False,
+                                 chunksize=chunksize,
+                                 compression=compression(path),
+                                 usecols=_usecols(columns))
+            for chunk in reader:
+                yield chunk, f.tell()
+
+
+def read_table(path, columns=None, where=(), fmt=None):
+    """ Reads the table or only those of its columns that are in ``columns``.
+
+    Only the rows satisfying the predicates ``where`` are kept, which is
+    done chunk-wise so the other rows are never held all at once. If
+    ``columns`` selects none of its columns, the rows are only counted and
+    the frame has no columns.
+    """
+    fmt = table_format(path, fmt)
+    if where:
+        frames = [_filtered(chunk, columns, where) for chunk, _ in
+                  read_chunks(path, _WHERE_CHUNK_SIZE,
+                              _needed(columns, where), fmt)]
+        if not frames:
+            empty = pd.DataFrame(columns=table_columns(path, fmt))
+            return _filtered(empty, columns, where)
+        return concat(frames)
+    if _selects_nothing(path, columns, fmt):
+        return _no_columns(0, _row_count(path, fmt))
+    if fmt == 'parquet':
+        names = _projection(table_columns(path, fmt), columns)
+        return pd.read_parquet(path, columns=names)
+    if fmt == 'sqlite':
+        with _connect(path) as con:
+            return pd.read_sql_query(_select(con, columns), con)
+    return pd.read_csv(path, sep="\t", low_memory=False,
+                       usecols=_usecols(columns))
+
+
+def measure_width(values, sample_size=None):
+    """ Returns the 99% quantile of the string lengths of ``values``.
+
+    Only a random sample of ``sample_size`` values is measured in longer
+    columns. Missing values count as "nan".
+    """
+    if sample_size and len(values) > sample_size:
+        values = values.sample(sample_size, random_state=0)
+    lengths = values.astype(str).str.len().fillna(len(str(np.nan)))
+    return lengths.quantile(.99)
+
+
+def encode_categories(df, max_ratio=.5):
+    """ Stores string columns with few distinct values as categoricals.
+
+    A column is encoded if it has at most ``max_ratio`` distinct values
+    per row. The categories are sorted so the codes sort like the values.
+    """
+    for col in df.columns:
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype) or \
+                pd.api.types.is_numeric_dtype(values.dtype) or \
+                pd.api.types.infer_dtype(values, skipna=True) != 'string':
+            continue
+        if values.nunique() <= max_ratio * len(values):
+            df[col] = values.astype('category')
+    return df
+
+
+def table_part(path, rows, fmt=None, stat=None):
+    """ Returns the bookkeeping needed to detect appends to a table.
+
+    Only uncompressed tab-separated tables can be appended to. ``stat`` is
+    the ``os.stat`` of the table before its ``rows`` were read. If the table
+    changed while it was read, it is unknown which rows were read and the
+    part counts as changed.
+    """
+    fmt = table_format(path, fmt)
+    columns = table_columns(path, fmt)
+    now = os.stat(path)
+    if stat is None:
+        stat = now
+    tail = b''
+    if (stat.st_size, stat.st_mtime_ns) != (now.st_size, now.st_mtime_ns):
+        return {
+            'path': os.path.abspath(path),
+            'format': fmt,
+            'size': stat.st_size,
+            'mtime': None,
+            'rows': rows,
+            'columns': list(columns),
+            'tail': tail.hex(),
+        }
+    if fmt == 'tsv' and compression(path) is None:
+        with open(path, 'rb') as f:
+            f.seek(max(0, stat.st_size - _TAIL_BYTES))
+            tail = f.read()
+    return {
+        'path': os.path.abspath(path),
+        'format': fmt,
+        'size': stat.st_size,
+        'mtime': stat.st_mtime_ns,
+        'rows': rows,
+        'columns': list(columns),
+        'tail': tail.hex(),
+    }
+
+
+def table_change(part):
+    """ Returns whether the table of ``part`` is "same", "appended" or
+    "changed" since ``part`` was recorded.
+
+    A table counts as appended if it grew, the recorded content ended with
+    a line break and the last bytes before the recorded size are unchanged.
+    """
+    try:
+        stat = os.stat(part['path'])
+    except OSError:
+        return 'changed'
+    if stat.st_size == part['size'] and stat.st_mtime_ns == part['mtime']:
+        return 'same'
+    tail = bytes.fromhex(part['tail'])
+    if stat.st_size <= part['size'] or not tail.endswith(b'\n'):
+        return 'changed'
+    with open(part['path'], 'rb') as f:
+        f.seek(part['size'] - len(tail))
+        if f.read(len(tail)) != tail:
+            return 'changed'
+    return 'appended'
+
+
+def read_appended(part, columns=None, where=()):
+    """ Reads the rows appended to the table after ``part`` was recorded. """
+    needed = _needed(columns, where)
+    nothing = needed is not None and not _projection(part['columns'], needed)
+    with open(part['path'], 'rb') as f:
+        f.seek(part['size'])
+        # the first column only counts the rows if no column is needed
+        df = pd.read_csv(f, sep="\t", header=None, names=part['columns'],
+                         low_memory=False,
+                         usecols=[0] if nothing else _usecols(columns, where))
+    if nothing:
+        return df.iloc[:, :0]
+    return _filtered(df, columns, where)
+
+
+def harmonise(frames):
+    """ Aligns columns and dtypes of the frames so they concat in one go.
+
+    Numbers in columns that hold text in other frames become text.
+    """
+    columns = sorted(set().union(*(df.columns for df in frames)))
+    kinds = dict()
+    for df in frames:
+        for col, dtype in df.dtypes.items():
+            numeric = isinstance(dtype, np.dtype) and dtype.kind in 'biuf'
+            kinds.setdefault(col, set()).add(numeric)
+    mixed = [col for col, k in kinds.items() if len(k) > 1]
+    result = list()
+    for df in frames:
+        df = df.reindex(columns=columns)
+        for col in mixed:
+            # as if the numbers were read as text with the other values
+            df[col] = df[col].astype(object).map(str, na_action='ignore')
+        result.append(df)
+    return result
+
+
+def read_tables(paths, jobs=1, columns=None, where=(), fmt=None):
+    """ Reads the tables using up to ``jobs`` processes. """
+    jobs = min(jobs, len(paths))
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            return list(pool.map(read_table, paths, [columns] * len(paths),
+                                 [where] * len(paths), [fmt] * len(paths)))
+    return [read_table(path, columns, where, fmt) for path in paths]
+
+
+def concat(frames):
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(harmonise(frames))
+
+
+class TableStream:
+    """ Reads tables chunk-wise on a background thread.
+
+    The main thread collects the chunks read so far with ``fetch``.
+    """
+
+    def __init__(self, paths, chunksize, columns=None, where=(), fmt=None):
+        self.paths = list(paths)
+        self.chunksize = chunksize
+        self.columns = columns
+        self.where = where
+        self.fmt = fmt
+        self.total_bytes = sum(os.path.getsize(path) for path in self.paths)
+        self.read_bytes = 0
+        self.parts = list()  # (path, rows, stat) of each finished table
+        self.error = None
+        self.done = False
+        self._chunks = list()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._read, daemon=True)
+        self._thread.start()
+
+    def _read(self):
+        finished_bytes = 0
+        try:
+            for path in self.paths:
+                stat = os.stat(path)
+                rows = 0
+                chunks = read_chunks(path, self.chunksize,
+                                     _needed(self.columns, self.where),
+                                     self.fmt)
+                for chunk, position in chunks:
+                    chunk = _filtered(chunk, self.columns, self.where)
+                    rows += len(chunk)
+                    with self._lock:
+                        if len(chunk):
+                            self._chunks.append(chunk)
+                        self.read_bytes = finished_bytes + position
+                finished_bytes += os.path.getsize(path)
+                self.parts.append((path, rows, stat))
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+
+    def fetch(self):
+        """ Returns the chunks read since the last call. """
+        with self._lock:
+            chunks, self._chunks = self._chunks, list()
+        return chunks
+
+    @property
+    def progress(self):
+        return self.read_bytes / max(1, self.total_bytes)
+
+
+def snapshot_name(paths, where=()):
+    """ Returns the directory name of the snapshot of the tables in ``paths``
+    filtered by ``where`` within a snapshot cache. """
+    identity = json.dumps([[os.path.abspath(p) for p in paths], where])
+    return hashlib.sha1(identity.encode('utf-8')).hexdigest()[:16]
+
+
+@contextmanager
+def snapshot_lock(path):
+    """ Serialises the writing of the snapshot ``path`` among processes.
+
+    The lock is reentrant within a process. Nothing is locked if ``path``
+    is ``None`` or the lock file cannot be created.
+    """
+    if path is None or path in _held_locks:
+        yield
+        return
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        f = open(path + '.lock', 'a')
+    except OSError:
+        yield
+        return
+    with f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        _held_locks.add(path)
+        try:
+            yield
+        finally:
+            _held_locks.discard(path)
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _code_dtype(n_categories):
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _write_strings(path, values):
+    values = list(values)
+    for val in values:
+        if not isinstance(val, str):
+            raise TypeError(f'Cannot snapshot value of type {type(val)}.')
+        if _STRING_SEP in val:
+            raise ValueError('Cannot snapshot strings containing NUL.')
+    with open(path, 'wb') as f:
+        f.write(_STRING_SEP.join(values).encode('utf-8'))
+    return len(values)
+
+
+def _read_strings(path, length):
+    if length == 0:
+        return []
+    with open(path, 'rb') as f:
+        return f.read().decode('utf-8').split(_STRING_SEP)
+
+
+def _write_column(path, name, values):
+    info = {'name': name, 'file': os.path.basename(path),
+            'dtype': str(values.dtype)}
+    if isinstance(values.dtype, np.dtype) and values.dtype.kind in 'biuf':
+        info['kind'] = 'array'
+        np.save(path + '.npy', values.to_numpy())
+        return info
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.values
+        uniques = values.cat.categories
+    else:
+        try:
+            codes, uniques = pd.factorize(values, sort=True)
+        except TypeError:
+            codes, uniques = pd.factorize(values)
+    info['kind'] = 'strings'
+    info['length'] = _write_strings(path + '.strings', uniques)
+    # the dtype pandas uses for the codes so they are not copied on read
+    np.save(path + '.codes.npy', codes.astype(_code_dtype(len(uniques)),
+                                              copy=False))
+    return info
+
+
+def _read_column(path, info):
+    base = os.path.join(path, info['file'])
+    if info['kind'] == 'array':
+        return np.load(base + '.npy', mmap_mode='r')
+    codes = np.load(base + '.codes.npy', mmap_mode='r')
+    uniques = _read_strings(base + '.strings', info['length'])
+    values = pd.Categorical.from_codes(codes, categories=uniques,
+                                       validate=False)
+    if info['dtype'] != 'category':
+        values = pd.Series(values).astype(info['dtype']).values
+    return values
+
+
+def _read_meta(path, key):
+    try:
+        with open(os.path.join(path, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('version') != SNAPSHOT_VERSION or meta.get('key') != key:
+        return None
+    return meta
+
+
+def _write_meta(path, meta):
+    tmp_name = os.path.join(path, f'meta.json.tmp{os.getpid()}')
+    with open(tmp_name, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_name, os.path.join(path, 'meta.json'))
+
+
+def write_snapshot(path, key, df, **extra):
+    """ Writes the data frame ``df`` and the json-able ``extra`` to ``path``.
+    """
+    tmp_path = f'{path}.tmp{os.getpid()}'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    os.makedirs(tmp_path)
+    try:
+        columns = [_write_column(os.path.join(tmp_path, f'c{i}'), col, df[col])
+                   for i, col in enumerate(df.columns)]
+        n_index = _write_strings(os.path.join(tmp_path, 'index.strings'),
+                                 df.index)
+        _write_meta(tmp_path, {
+            'version': SNAPSHOT_VERSION,
+            'key': key,
+            'columns': columns,
+            'index_length': n_index,
+            'extra': extra,
+        })
+        old_path = f'{path}.old{os.getpid()}'
+        if os.path.exists(path):
+            os.rename(path, old_path)
+        os.rename(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+
+def add_to_snapshot(path, key, df):
+    """ Adds the columns of ``df`` to the snapshot of ``key`` in ``path``.
+    """
+    meta = _read_meta(path, key)
+    if meta is None:
+        return
+    known = {info['name'] for info in meta['columns']}
+    n_files = len(meta['columns'])
+    for col in df.columns:
+        if col in known:
+            continue
+        name = f'c{n_files}.{os.getpid()}'
+        meta['columns'].append(_write_column(os.path.join(path, name), col,
+                                             df[col]))
+        n_files += 1
+    _write_meta(path, meta)
+
+
+def read_snapshot(path, key, columns=None):
+    """ Returns the data frame and the extras saved under ``path``.
+
+    Only the saved ones of ``columns`` are read if they are given.
+    Returns ``None`` if there is no snapshot for ``key``.
+    """
+    meta = _read_meta(path, key)
+    if meta is None:
+        return None
+    data = dict()
+    try:
+        for info in meta['columns']:
+            if columns is None or info['name'] in columns:
+                data[info['name']] = _read_column(path, info)
+        index = pd.Index(_read_strings(os.path.join(path, 'index.strings'),
+                                       meta['index_length']))
+    except (OSError, ValueError):
+        # replaced by another session while reading
+        return None
+    df = pd.DataFrame(data, index=index, columns=list(data), copy=False)
+    return df, meta['extra']
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2019 Gesellschaft zur Foerderung der angewandten Forschung e.V.
+# acting on behalf of its Fraunhofer Institute for Cell Therapy and Immunology
+# (IZI).
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with
+# this program. If not, see http://www.gnu.org/licenses/.
+
+"""Tag values in arrays aligned with the rows of the table.
+
+A tag keeps one value per table row in a NumPy array and a mask of the
+tagged rows. Integers are stored as they are and any other values as codes
+into the list of their distinct values. Samples that are not in the table
+are kept in a dict, so their tags survive until the sample is loaded again.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _is_int(value):
+    return isinstance(value, (int, np.integer)) and \
+        not isinstance(value, (bool, np.bool_))
+
+
+def _python(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class TagColumn:
+    """ The values of one tag for the rows of ``index``. """
+
+    def __init__(self, index, data=None):
+        self.index = index
+        self.extra = dict()
+        self._tagged = np.zeros(len(index), dtype=bool)
+        self._values = np.zeros(len(index), dtype=np.int64)
+        # None while the values are integers, else the distinct values
+        self._categories = None
+        self._codes = None
+        if data:
+            self.update(data)
+
+    def __len__(self):
+        return int(self._tagged.sum()) + len(self.extra)
+
+    def _to_codes(self):
+        values = self._values[self._tagged]
+        uniques, codes = np.unique(values, return_inverse=True)
+        self._categories = uniques.tolist()
+        self._codes = {value: code for code, value in
+                       enumerate(self._categories)}
+        self._values = np.zeros(len(self.index), dtype=np.int32)
+        self._values[self._tagged] = codes
+
+    def _encode(self, value):
+        """ Returns what is stored in the array for ``value``. """
+        value = _python(value)
+        if self._categories is None:
+            if _is_int(value):
+                return value
+            self._to_codes()
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self._categories)
+            self._categories.append(value)
+        return code
+
+    def _decode(self, stored):
+        if self._categories is None:
+            return stored
+        categories = np.empty(len(self._categories), dtype=object)
+        categories[:] = self._categories
+        return categories[stored]
+
+    def _locate(self, ids):
+        """ Returns the ``ids`` as an array and their rows in the table or
+        -1. """
+        ids = np.asarray(ids, dtype=object)
+        return ids, self.index.get_indexer(pd.Index(ids, dtype=object))
+
+    def _scatter(self, rows, values):
+        if self._categories is None and \
+                pd.api.types.is_integer_dtype(values.dtype):
+            self._values[rows] = values
+        else:
+            # switch to codes first, else integers are stored as codes
+            if self._categories is None:
+                self._to_codes()
+            codes, uniques = pd.factorize(values, use_na_sentinel=False)
+            stored = [self._encode(value) for value in uniques]
+            self._values[rows] = np.asarray(stored, dtype=np.int32)[codes]
+        self._tagged[rows] = True
+
+    def update(self, data):
+        """ Sets the values of the ids in the dict ``data``.
+
+        >>> column = TagColumn(pd.Index(['a', 'b', 'c']))
+        >>> column.update({'a': 1, 'b': 'x', 'c': 'y', 'd': 2})
+        >>> column.to_dict()
+        {'a': 1, 'b': 'x', 'c': 'y', 'd': 2}
+        >>> column.update({'b': 5})
+        >>> column.to_dict()
+        {'a': 1, 'b': 5, 'c': 'y', 'd': 2}
+        """
+        values = np.empty(len(data), dtype=object)
+        values[:] = list(data.values())
+        ids, rows = self._locate(list(data))
+        inside = rows >= 0
+        if inside.any():
+            inside_values = values[inside]
+            if all(_is_int(value) for value in inside_values):
+                inside_values = inside_values.astype(np.int64)
+            self._scatter(rows[inside], inside_values)
+        for position in np.flatnonzero(~inside):
+            self.extra[ids[position]] = _python(values[position])
+
+    def assign(self, ids, value):
+        """ Sets the value of all ``ids`` to ``value``. """
+        ids, rows = self._locate(ids)
+        stored = self._encode(value)
+        inside = rows[rows >= 0]
+        self._values[inside] = stored
+        self._tagged[inside] = True
+        for id in ids[rows < 0]:
+            self.extra[id] = _python(value)
+
+    def remove(self, ids):
+        """ Removes the values of the ``ids``. """
+        ids, rows = self._locate(ids)
+        self._tagged[rows[rows >= 0]] = False
+        for id in ids[rows < 0]:
+            self.extra.pop(id, None)
+
+    def snapshot(self, ids):
+        """ Returns the values of the ``ids`` to ``restore`` them later.
+
+        >>> column = TagColumn(pd.Index(['a', 'b']), {'a': 1})
+        >>> before = column.snapshot(['a', 'b', 'z'])
+        >>> column.assign(['a', 'b', 'z'], 'x')
+        >>> column.to_dict()
+        {'a': 'x', 'b': 'x', 'z': 'x'}
+        >>> column.restore(before)
+        >>> column.to_dict()
+        {'a': 1}
+        """
+        ids, rows = self._locate(ids)
+        tagged = np.zeros(len(ids), dtype=bool)
+        values = np.empty(len(ids), dtype=object)
+        inside = rows >= 0
+        tagged[inside] = self._tagged[rows[inside]]
+        values[inside] = self._decode(self._values[rows[inside]])
+        for position in np.flatnonzero(~inside):
+            id = ids[position]
+            tagged[position] = id in self.extra
+            values[position] = self.extra.get(id)
+        return ids, tagged, values
+
+    def restore(self, snapshot):
+        """ Sets the values of a ``snapshot`` again. """
+        ids, tagged, values = snapshot
+        self.remove(ids[~tagged])
+        self.update(dict(zip(ids[tagged], values[tagged])))
+
+    def values_of(self, ids):
+        """ Returns the distinct values of the tagged ``ids``. """
+        _, tagged, values = self.snapshot(ids)
+        return set(_python(value) for value in values[tagged])
+
+    def to_dict(self):
+        """ Returns the values by id, e.g., to write them to a file. """
+        rows = np.flatnonzero(self._tagged)
+        values = self._decode(self._values[rows]).tolist()
+        data = dict(zip(self.index[rows], values))
+        data.update(self.extra)
+        return data
+
+    def align(self, index):
+        """ Moves the values to the rows of a new table ``index``. """
+        if index is self.index:
+            return
+        data = self.to_dict()
+        self.__init__(index, data)
+
+    def view(self, index, missing):
+        """ Returns the values for the ``index`` of the table rows followed by
+        samples that are not in the table. Untagged rows are ``missing``.
+
+        >>> column = TagColumn(pd.Index(['a', 'b']), {'a': 2, 'z': 3})
+        >>> column.view(pd.Index(['a', 'b', 'z']), '-').tolist()
+        [2, '-', 3]
+        >>> column.assign(['b'], 'x')
+        >>> column.view(pd.Index(['a', 'b', 'z']), '-').tolist()
+        [2, 'x', 3]
+        """
+        n = len(self.index)
+        extra = index[n:]
+        if self._categories is None:
+            values = np.full(len(index), missing, dtype=object)
+            values[:n][self._tagged] = self._values[self._tagged]
+            for position, id in enumerate(extra, n):
+                if id in self.extra:
+                    values[position] = self.extra[id]
+            return pd.Series(values, index=index, dtype=object)
+        stored = [self._encode(self.extra[id]) if id in self.extra else -1
+                  for id in extra]
+        missing_code = self._codes.get(missing, len(self._categories))
+        categories = np.empty(max(missing_code + 1, len(self._categories)),
+                              dtype=object)
+        categories[:len(self._categories)] = self._categories
+        categories[missing_code] = missing
+        codes = np.full(len(index), missing_code, dtype=np.int32)
+        codes[:n][self._tagged] = self._values[self._tagged]
+        codes[n:][np.asarray(stored, dtype=np.int32) >= 0] = \
+            [code for code in stored if code >= 0]
+        values = pd.Categorical.from_codes(
+            codes, categories=pd.Index(categories, dtype=object))
+        return pd.Series(values, index=index)
+
+
+class TagStore(dict):
+    """ The ``TagColumn`` of each tag with the index of the table. """
+
+    def __init__(self, index, data=None):
+        super().__init__()
+        self.index = index
+        for tag, values in (data or dict()).items():
+            self[tag] = TagColumn(index, values)
+
+    def add(self, tag):
+        """ Returns the column of ``tag`` and adds it if it is new. """
+        if tag not in self:
+            self[tag] = TagColumn(self.index)
+        return self[tag]
+
+    def align(self, index):
+        """ Moves the values of all tags to the rows of a new table
+        ``index``. """
+        self.index = index
+        for column in self.values():
+            column.align(index)
+
+    def extra_ids(self):
+        """ Returns the tagged ids that are not in the table in the order
+        they were first tagged in. """
+        ids = dict()
+        for column in self.values():
+            ids.update(dict.fromkeys(column.extra))
+        return list(ids)
+
+    def to_dict(self):
+        return {tag: column.to_dict() for tag, column in self.items()}
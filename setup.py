@@ -14,6 +14,10 @@ setuptools.setup(
     url="https://ribogit.izi.fraunhofer.de/Dominik/geotag",
     packages=setuptools.find_packages(),
     install_requires=['pyyaml', 'numpy', 'pandas'],
+    extras_require={
+        'parquet': ['pyarrow'],
+        'zstd': ['zstandard'],
+    },
     classifiers=[
                 "Programming Language :: Python :: 3",
                 "License :: OSI Approved :: GNUv3 License",
@@ -0,0 +1,212 @@
+"""Tests of the cached sort orders against a fresh sort."""
+
+import re
+import unittest.mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from geotag.geotag import App
+from geotag.sorting import SortCache
+from geotag.undo import stack
+
+
+def _natural(value):
+    """ Numbers before text, text with its runs of digits as numbers. """
+    if isinstance(value, (int, float)):
+        return 0, value, ()
+    parts = re.split(r'(\d+)', str(value))
+    return 1, 0, tuple(int(p) if p.isdigit() else p for p in parts)
+
+
+def _missing(value, missing):
+    return value is None or (isinstance(value, float) and np.isnan(value)) \
+        or value == missing
+
+
+def fresh_order(columns, order, missing='-'):
+    """ Returns the rows sorted by ``order`` without any cache.
+
+    Each pass is a stable sort, so the passes from the last column of
+    ``order`` to the first sort like all columns at once. Missing values
+    come last in either direction and ties keep the order of the rows.
+    """
+    rows = list(range(len(next(iter(columns.values())))))
+    for col, ascending in reversed(order):
+        values = columns[col]
+        present = [r for r in rows if not _missing(values[r], missing)]
+        absent = [r for r in rows if _missing(values[r], missing)]
+        rows = sorted(present, key=lambda r: _natural(values[r]),
+                      reverse=not ascending) + absent
+    return rows
+
+
+def _values(n, rng):
+    values = np.empty(n, dtype=object)
+    choices = ['GSE200', 'GSE1000', 'GSE30', 'gsm7', 'b', 'a10', 'a9',
+               7, 2.5, -1, np.nan, '-']
+    values[:] = [choices[i] for i in rng.integers(len(choices), size=n)]
+    return values
+
+
+class Columns:
+    """ Columns of object values with a token per version. """
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.tokens = {col: 0 for col in columns}
+        self.changes = dict()
+
+    def set(self, col, rows, values):
+        self.columns[col] = self.columns[col].copy()
+        self.columns[col][rows] = values
+        self.tokens[col] += 1
+        self.changes[(col, self.tokens[col])] = np.asarray(rows)
+
+    def values(self, col):
+        return pd.Series(self.columns[col], dtype=object)
+
+    def changed(self, col, old, new):
+        rows = [self.changes[(col, token)]
+                for token in range(old + 1, new + 1)]
+        return np.unique(np.concatenate(rows))
+
+    def permutation(self, cache, order):
+        tokens = tuple(self.tokens[col] for col, _ in order)
+        return cache.permutation(order, tokens, self.values, self.changed)
+
+
+ORDERS = [
+    (('a', True),),
+    (('a', False),),
+    (('a', True), ('b', False)),
+    (('b', False), ('a', True)),
+]
+
+
+@pytest.mark.parametrize('order', ORDERS)
+def test_fresh_sort(order):
+    rng = np.random.default_rng(0)
+    columns = Columns({'a': _values(500, rng), 'b': _values(500, rng)})
+    permutation = columns.permutation(SortCache('-'), order)
+    assert permutation.tolist() == fresh_order(columns.columns, order)
+
+
+@pytest.mark.parametrize('order', ORDERS)
+def test_reinsert_after_changes(order):
+    rng = np.random.default_rng(1)
+    columns = Columns({'a': _values(2000, rng), 'b': _values(2000, rng)})
+    cache = SortCache('-')
+    columns.permutation(cache, order)
+    for step in range(20):
+        # every third step changes both columns before the next sort
+        for col in 'ab' if step % 3 == 0 else 'ab'[step % 2]:
+            rows = rng.choice(2000, size=4, replace=False)
+            columns.set(col, rows, _values(4, rng))
+        permutation = columns.permutation(cache, order)
+        assert permutation.tolist() == fresh_order(columns.columns, order)
+
+
+def test_reinsert_is_used():
+    rng = np.random.default_rng(2)
+    columns = Columns({'a': _values(2000, rng)})
+    cache = SortCache('-')
+    columns.permutation(cache, (('a', True),))
+    columns.set('a', [3, 1000], ['GSE1', np.nan])
+    with unittest.mock.patch('numpy.lexsort') as lexsort:
+        permutation = columns.permutation(cache, (('a', True),))
+    lexsort.assert_not_called()
+    assert permutation.tolist() == fresh_order(columns.columns,
+                                               (('a', True),))
+
+
+def test_unknown_changes_sort_again():
+    rng = np.random.default_rng(3)
+    columns = Columns({'a': _values(300, rng)})
+    cache = SortCache('-')
+    columns.permutation(cache, (('a', False),))
+    columns.columns['a'] = _values(300, rng)
+    columns.tokens['a'] += 1
+    permutation = cache.permutation((('a', False),), (columns.tokens['a'],),
+                                    columns.values, lambda *args: None)
+    assert permutation.tolist() == fresh_order(columns.columns,
+                                               (('a', False),))
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    rng = np.random.default_rng(4)
+    n = 400
+    titles = _values(n, rng)
+    table = pd.DataFrame({
+        'gse': [f'GSE{i % 7}' for i in range(n)],
+        'id': [f'GSM{i}' for i in range(n)],
+        'title': [t if isinstance(t, str) or not pd.isna(t) else None
+                  for t in titles],
+    })
+    path = tmp_path / 'samples.tsv'
+    table.to_csv(path, sep='\t', index=False)
+    monkeypatch.setattr(App, 'save_tag_data',
+                        lambda self, asynchronous=True: None)
+    stack().clear()
+    app = App(table=[str(path)], log=str(tmp_path / 'geotag.log'),
+              tags=str(tmp_path / 'tags.yml'),
+              output=str(tmp_path / 'tagger.yml'), user='tagger',
+              softPath=None, showKey=False)
+    app.stdscr = unittest.mock.MagicMock()
+    app.filter = dict()
+    app.sort_columns = set()
+    app.sort_reverse_columns = set()
+    app.update_content()
+    return app
+
+
+def _sort(app, order):
+    app.sort_columns = {col for col, ascending in order if ascending}
+    app.sort_reverse_columns = {col for col, ascending in order
+                                if not ascending}
+    app.ordered_columns = [col for col, _ in order] + \
+        [col for col in app.ordered_columns if col not in dict(order)]
+    app.update_content()
+
+
+def _check(app, order):
+    app.update_content()
+    index = app._stages['merge'][1][2]
+    columns = {col: app._view_column(col).astype(object).to_numpy()
+               for col, _ in order}
+    expected = index[fresh_order(columns, order, app.missing_data_value)]
+    assert app.df.index.tolist() == expected.tolist()
+
+
+def _select(app, rows):
+    app.selection = set(rows)
+    app.pointer = min(rows)
+
+
+APP_ORDERS = [
+    (('quality', True),),
+    (('quality', False),),
+    (('quality', False), ('title', True)),
+    (('title', False), ('quality', True)),
+]
+
+
+@pytest.mark.parametrize('order', APP_ORDERS)
+def test_view_after_tag_changes(app, order):
+    _sort(app, order)
+    _check(app, order)
+    rng = np.random.default_rng(5)
+    for value in [3, 7, 3, 0, 12]:
+        _select(app, rng.choice(len(app.df), size=3, replace=False))
+        app.set_tag('quality', value, app._view_state)
+        _check(app, order)
+    _select(app, rng.choice(len(app.df), size=3, replace=False))
+    app.del_tag_data('quality')
+    _check(app, order)
+    for _ in range(3):
+        stack().undo()
+        _check(app, order)
+    stack().redo()
+    _check(app, order)
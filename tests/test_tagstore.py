@@ -0,0 +1,161 @@
+"""Tests of the tag values kept in arrays aligned with the table."""
+
+import unittest.mock
+
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+
+from geotag.geotag import App
+from geotag.tagstore import TagColumn, TagStore
+
+
+DATA = {
+    'quality': {'GSE1_GSM1': 3, 'GSE1_GSM2': 0, 'GSE9_GSM9': 7},
+    'note': {'GSE1_GSM2': 'degraded', 'GSE2_GSM3': 'check\nagain',
+             'GSE9_GSM8': 'not loaded'},
+    'mixed': {'GSE1_GSM1': 1, 'GSE2_GSM3': 'one', 'GSE9_GSM9': 2},
+}
+
+
+def _index(*ids):
+    return pd.Index(list(ids), dtype=object)
+
+
+@pytest.fixture
+def index():
+    return _index('GSE1_GSM1', 'GSE1_GSM2', 'GSE2_GSM3', 'GSE2_GSM4')
+
+
+def _round_trip(store, index):
+    text = yaml.dump({'tags': store.to_dict()}, default_flow_style=False)
+    return TagStore(index, yaml.load(text, Loader=yaml.SafeLoader)['tags'])
+
+
+def test_yaml_round_trip(index):
+    store = TagStore(index, DATA)
+    assert store.to_dict() == DATA
+    assert _round_trip(store, index).to_dict() == DATA
+
+
+def test_yaml_has_plain_values(index):
+    store = TagStore(index, DATA)
+    store['quality'].assign(['GSE2_GSM4', 'GSE9_GSM7'], np.int64(5))
+    store['note'].assign(['GSE2_GSM4'], np.str_('fine'))
+    store['mixed'].update({'GSE2_GSM4': np.int64(6), 'GSE9_GSM6': np.int64(6)})
+    text = yaml.dump({'tags': store.to_dict()}, default_flow_style=False)
+    assert '!!python' not in text
+    data = _round_trip(store, index).to_dict()
+    assert data['quality']['GSE2_GSM4'] == 5
+    assert data['quality']['GSE9_GSM7'] == 5
+    assert data['note']['GSE2_GSM4'] == 'fine'
+    assert data['mixed']['GSE9_GSM6'] == 6
+
+
+def test_integers_become_codes(index):
+    column = TagColumn(index, {'GSE1_GSM1': 3, 'GSE1_GSM2': 4})
+    column.assign(['GSE2_GSM3'], 'text')
+    column.update({'GSE2_GSM4': 4, 'GSE9_GSM9': 5})
+    assert column.to_dict() == {'GSE1_GSM1': 3, 'GSE1_GSM2': 4,
+                                'GSE2_GSM3': 'text', 'GSE2_GSM4': 4,
+                                'GSE9_GSM9': 5}
+    assert column.values_of(['GSE1_GSM2', 'GSE2_GSM4']) == {4}
+
+
+def test_ids_missing_from_the_table(index):
+    store = TagStore(index, DATA)
+    assert store.extra_ids() == ['GSE9_GSM9', 'GSE9_GSM8']
+    merged = index.append(_index(*store.extra_ids()))
+    assert store['quality'].view(merged, '-').tolist() == \
+        [3, 0, '-', '-', 7, '-']
+    assert store['note'].view(merged, '-').astype(object).tolist() == \
+        ['-', 'degraded', 'check\nagain', '-', '-', 'not loaded']
+
+    column = store['quality']
+    before = column.snapshot(['GSE9_GSM9', 'GSE9_GSM7', 'GSE1_GSM1'])
+    column.assign(['GSE9_GSM9', 'GSE9_GSM7', 'GSE1_GSM1'], 1)
+    assert column.values_of(['GSE9_GSM9', 'GSE9_GSM7']) == {1}
+    column.remove(['GSE9_GSM9'])
+    assert 'GSE9_GSM9' not in column.to_dict()
+    column.restore(before)
+    assert column.to_dict() == DATA['quality']
+    assert len(column) == 3
+
+
+def test_align_after_reload(index):
+    store = TagStore(index, DATA)
+    # GSE9_GSM9 is loaded now, GSE1_GSM1 is gone and the rest moved
+    reloaded = _index('GSE2_GSM4', 'GSE9_GSM9', 'GSE2_GSM3', 'GSE1_GSM2')
+    store.align(reloaded)
+    assert store.to_dict() == DATA
+    assert store.extra_ids() == ['GSE1_GSM1', 'GSE9_GSM8']
+    merged = reloaded.append(_index(*store.extra_ids()))
+    assert store['quality'].view(merged, '-').tolist() == \
+        ['-', 7, '-', 0, 3, '-']
+    assert store['mixed'].view(merged, '-').astype(object).tolist() == \
+        ['-', 2, 'one', '-', 1, '-']
+    store.align(index)
+    assert store.to_dict() == DATA
+    assert store.extra_ids() == ['GSE9_GSM9', 'GSE9_GSM8']
+
+
+def _table(path, samples):
+    pd.DataFrame({
+        'gse': [sample.split('_')[0] for sample in samples],
+        'id': [sample.split('_')[1] for sample in samples],
+        'title': [f'title {i}' for i in range(len(samples))],
+    }).to_csv(path, sep='\t', index=False)
+
+
+def _app(tmp_path):
+    app = App(table=[str(tmp_path / 'samples.tsv')],
+              log=str(tmp_path / 'geotag.log'),
+              tags=str(tmp_path / 'tags.yml'),
+              output=str(tmp_path / 'tagger.yml'), user='tagger',
+              softPath=None, showKey=False)
+    app.stdscr = unittest.mock.MagicMock()
+    app.update_content()
+    return app
+
+
+def _view_tags(app, tag):
+    return {id: value for id, value in zip(app.df.index, app.df[tag])
+            if value != app.missing_data_value}
+
+
+def test_app_saves_and_loads_tags(tmp_path, monkeypatch):
+    _table(tmp_path / 'samples.tsv', ['GSE1_GSM1', 'GSE1_GSM2', 'GSE2_GSM3'])
+    with open(tmp_path / 'tagger.yml', 'w') as f:
+        yaml.dump({'tags': {'quality': {'GSE1_GSM2': 2, 'GSE9_GSM9': 4}}}, f)
+    # save in this process instead of a forked one
+    save = App.save_tag_data
+    monkeypatch.setattr(App, 'save_tag_data',
+                        lambda self, asynchronous=True: save(self, False))
+    app = _app(tmp_path)
+    assert _view_tags(app, 'quality') == {'GSE1_GSM2': 2, 'GSE9_GSM9': 4}
+    assert app.df.index[-1] == 'GSE9_GSM9'
+
+    app.selection = {app.df.index.get_loc('GSE1_GSM1')}
+    app.set_tag('quality', 8, app._view_state)
+    app.selection = {app.df.index.get_loc('GSE9_GSM9')}
+    app.set_tag('note', 'kept', app._view_state)
+    saved = _app(tmp_path)
+    expected = {'GSE1_GSM1': 8, 'GSE1_GSM2': 2, 'GSE9_GSM9': 4}
+    assert saved.tag_data.to_dict()['quality'] == expected
+    assert saved.tag_data.to_dict()['note'] == {'GSE9_GSM9': 'kept'}
+
+
+def test_app_aligns_tags_after_reload(tmp_path):
+    samples = ['GSE1_GSM1', 'GSE1_GSM2', 'GSE2_GSM3']
+    _table(tmp_path / 'samples.tsv', samples)
+    with open(tmp_path / 'tagger.yml', 'w') as f:
+        yaml.dump({'tags': {'quality': {'GSE1_GSM2': 2, 'GSE9_GSM9': 4}}}, f)
+    app = _app(tmp_path)
+    _table(tmp_path / 'samples.tsv', ['GSE9_GSM9'] + samples[1:])
+    app.reload_table()
+    app.update_content()
+    assert sorted(app.df.index) == ['GSE1_GSM2', 'GSE2_GSM3', 'GSE9_GSM9']
+    assert _view_tags(app, 'quality') == {'GSE1_GSM2': 2, 'GSE9_GSM9': 4}
+    assert app.tag_data.extra_ids() == []
+    assert app.df.loc['GSE9_GSM9', 'title'] == 'title 0'